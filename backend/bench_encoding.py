@@ -0,0 +1,67 @@
+"""Benchmark response encodings for a get_guests payload.
+
+Compares the JSON the API sends today with MessagePack, each raw and
+gzip/brotli compressed, on synthetic guests from seed.py:
+
+    python bench_encoding.py --guests 300
+"""
+import random
+import statistics
+import time
+from typing import List
+
+import msgpack
+import typer
+from pydantic import TypeAdapter
+from starlette.responses import JSONResponse
+
+from encoding import compressor
+from seed import user_documents
+from server import Guest
+
+app = typer.Typer(help="Benchmark JSON vs MessagePack and compression for guest lists.")
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return result, statistics.median(samples) * 1000
+
+
+def compressed(body: bytes, encoding: str) -> bytes:
+    compress, flush = compressor(encoding)
+    return compress(body) + flush()
+
+
+@app.command()
+def main(guests: int = typer.Option(300, help="Guests in the payload"), repeat: int = typer.Option(50)):
+    counts = {"budgets": 0, "guests": guests, "vendors": 0, "tasks": 0, "venues": 0}
+    docs = user_documents(random.Random(0), 0, counts, "x", "bench.example.com")["guests"]
+    adapter = TypeAdapter(List[Guest])
+
+    # The same steps get_guests goes through: build models, dump for JSON, render
+    content, model_ms = timed(lambda: adapter.dump_python([Guest(**doc) for doc in docs], mode="json"), repeat)
+    encoders = {
+        "json": lambda: JSONResponse(content).body,
+        "msgpack": lambda: msgpack.packb(content, use_bin_type=True),
+    }
+
+    rows = []
+    for name, encode in encoders.items():
+        body, encode_ms = timed(encode, repeat)
+        rows.append((name, len(body), encode_ms))
+        for encoding in ("gzip", "br"):
+            encoded, compress_ms = timed(lambda: compressed(body, encoding), repeat)
+            rows.append((f"{name}+{encoding}", len(encoded), encode_ms + compress_ms))
+
+    typer.echo(f"{guests} guests, model validation + dump: {model_ms:.2f} ms (shared by every format)")
+    typer.echo(f"{'format':<14}{'bytes':>10}{'vs json':>10}{'encode ms':>12}")
+    for name, size, ms in rows:
+        typer.echo(f"{name:<14}{size:>10}{size / rows[0][1]:>10.0%}{ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,154 @@
+"""Guest duplicate detection.
+
+Guests are bucketed by blocking keys (normalized email, phone digits and a
+surname/initial name key) and only guests sharing a bucket are compared, so
+the work grows with the bucket sizes rather than with every pair of guests.
+"""
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DUPLICATE_THRESHOLD = 0.8
+# Buckets larger than this (e.g. a very common surname) are not compared pairwise
+MAX_BLOCK_SIZE = 50
+# "Jon"/"John" pass, "Mary"/"Mark" (0.75) and "Tom"/"Tim" do not
+FIRST_NAME_SIMILARITY = 0.8
+# Fields that decide which record of a group is the most complete
+CONTACT_FIELDS = ("name", "email", "phone")
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    if not email:
+        return None
+    local, _, domain = email.strip().lower().partition("@")
+    return f"{local.split('+', 1)[0]}@{domain}"
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    digits = re.sub(r"\D", "", phone or "")
+    # Compare on the subscriber number so "+1 555..." and "555..." agree
+    return digits[-10:] if len(digits) >= 7 else None
+
+
+def name_tokens(name: Optional[str]) -> List[str]:
+    ascii_name = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode()
+    return re.findall(r"[a-z0-9]+", ascii_name.lower())
+
+
+def blocking_keys(guest: Dict) -> List[str]:
+    keys = []
+    email = normalize_email(guest.get("email"))
+    if email:
+        keys.append(f"e:{email}")
+    phone = normalize_phone(guest.get("phone"))
+    if phone:
+        keys.append(f"p:{phone}")
+    tokens = name_tokens(guest.get("name"))
+    if tokens:
+        # "Jon Smith" and "John Smith" share surname and first initial
+        keys.append(f"n:{tokens[-1]}:{tokens[0][0]}")
+    return keys
+
+
+def same_first_name(a: List[str], b: List[str]) -> bool:
+    """Whether two first-name tokens can be the same person ("Jon"/"John", "J"/"John").
+
+    Households share surnames, phones and emails, so without this check
+    "Mary Smith" and "Tom Smith" on one family phone would look like duplicates.
+    """
+    if not a or not b:
+        return False
+    first_a, first_b = a[0], b[0]
+    if first_a == first_b:
+        return True
+    if len(first_a) == 1 or len(first_b) == 1:
+        return first_a[0] == first_b[0]
+    return SequenceMatcher(None, first_a, first_b).ratio() >= FIRST_NAME_SIMILARITY
+
+
+def duplicate_score(a: Dict, b: Dict) -> float:
+    tokens_a, tokens_b = name_tokens(a.get("name")), name_tokens(b.get("name"))
+    name_similarity = SequenceMatcher(None, " ".join(tokens_a), " ".join(tokens_b)).ratio()
+    if not same_first_name(tokens_a, tokens_b):
+        # Different people, at most sharing a surname or household contact details
+        return 0.5 * name_similarity
+    email_a, email_b = normalize_email(a.get("email")), normalize_email(b.get("email"))
+    phone_a, phone_b = normalize_phone(a.get("phone")), normalize_phone(b.get("phone"))
+
+    if (email_a and email_a == email_b) or (phone_a and phone_a == phone_b):
+        return 0.5 + 0.5 * name_similarity
+    score = 0.9 * name_similarity
+    if (email_a and email_b) or (phone_a and phone_b):
+        # Both records carry contact details and none of them agree
+        score *= 0.8
+    return score
+
+
+def candidate_pairs(guests: List[Dict], new_only_from: int = 0) -> Iterable[Tuple[int, int]]:
+    """Yield index pairs that share at least one blocking key.
+
+    With new_only_from, pairs where both guests sit before that index are
+    skipped, which is how bulk imports compare only the incoming rows.
+    """
+    blocks: Dict[str, List[int]] = {}
+    for index, guest in enumerate(guests):
+        for key in blocking_keys(guest):
+            blocks.setdefault(key, []).append(index)
+
+    seen = set()
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > MAX_BLOCK_SIZE:
+            continue
+        for i, left in enumerate(members):
+            for right in members[i + 1:]:
+                if right < new_only_from or (left, right) in seen:
+                    continue
+                seen.add((left, right))
+                yield left, right
+
+
+def find_duplicates(guests: List[Dict], threshold: float = DUPLICATE_THRESHOLD, new_only_from: int = 0) -> List[Dict]:
+    """Group guests whose pairwise score reaches threshold.
+
+    Returns one entry per group with the guest ids, the best pair score and a
+    suggested primary: a guest from before new_only_from if the group has one
+    (those already exist), then the most complete record, then the earliest.
+    """
+    parent = list(range(len(guests)))
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    best: Dict[int, float] = {}
+    for left, right in candidate_pairs(guests, new_only_from):
+        score = duplicate_score(guests[left], guests[right])
+        if score < threshold:
+            continue
+        root_left, root_right = find(left), find(right)
+        if root_left != root_right:
+            parent[root_right] = root_left
+        root = find(left)
+        best[root] = max(score, best.pop(root_left, 0), best.pop(root_right, 0))
+
+    groups: Dict[int, List[int]] = {}
+    for index in range(len(guests)):
+        root = find(index)
+        if root in best:
+            groups.setdefault(root, []).append(index)
+
+    proposals = []
+    for root, members in groups.items():
+        primary = max(members, key=lambda index: (
+            index < new_only_from, sum(1 for field in CONTACT_FIELDS if guests[index].get(field))
+        ))
+        proposals.append({
+            "guest_ids": [guests[index]["id"] for index in members],
+            "primary_id": guests[primary]["id"],
+            "score": round(best[root], 3),
+        })
+    proposals.sort(key=lambda proposal: proposal["score"], reverse=True)
+    return proposals
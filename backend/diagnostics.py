@@ -0,0 +1,136 @@
+"""Opt-in request profiling and MongoDB slow-query logging."""
+import asyncio
+import cProfile
+import hmac
+import logging
+import random
+import re
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from pymongo import monitoring
+from starlette.datastructures import Headers, MutableHeaders
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("slow_queries")
+
+EXPLAINABLE_COMMANDS = ("find", "aggregate", "count", "distinct")
+# Driver bookkeeping that explain() rejects or that is not part of the query
+COMMAND_METADATA_FIELDS = (
+    "lsid", "txnNumber", "autocommit", "$db", "$clusterTime",
+    "$readPreference", "readConcern", "writeConcern", "cursor",
+)
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    """Logs every Mongo command slower than threshold_ms, with its filter.
+
+    Read commands additionally get their queryPlanner output logged. The
+    listener is called from the driver's worker threads, so the explain is
+    handed back to the event loop instead of being run inline.
+    """
+
+    def __init__(self, threshold_ms: float):
+        self.threshold_ms = threshold_ms
+        self.client = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._commands = {}
+
+    def started(self, event):
+        self._commands[(event.connection_id, event.request_id)] = event.command
+
+    def succeeded(self, event):
+        command = self._commands.pop((event.connection_id, event.request_id), None)
+        duration_ms = event.duration_micros / 1000
+        if command is None or duration_ms < self.threshold_ms:
+            return
+        name = event.command_name
+        query = command.get("filter", command.get("pipeline", command.get("query", command.get("updates"))))
+        slow_query_logger.warning(
+            "Slow %s on %s.%s took %.1f ms filter=%s",
+            name, event.database_name, command.get(name), duration_ms, query
+        )
+        if name in EXPLAINABLE_COMMANDS and self.client is not None and self.loop is not None:
+            self.loop.call_soon_threadsafe(self._schedule_explain, event.database_name, command)
+
+    def failed(self, event):
+        self._commands.pop((event.connection_id, event.request_id), None)
+
+    def _schedule_explain(self, database_name, command):
+        asyncio.ensure_future(self.explain(database_name, command))
+
+    async def explain(self, database_name, command):
+        query = {k: v for k, v in command.items() if k not in COMMAND_METADATA_FIELDS}
+        name = next(iter(query))
+        try:
+            plan = await self.client[database_name].command(
+                {"explain": query, "verbosity": "queryPlanner"}
+            )
+        except Exception:
+            slow_query_logger.exception("explain() failed for slow %s on %s.%s", name, database_name, query[name])
+            return
+        planner = plan.get("queryPlanner")
+        if planner is None:
+            # Aggregations nest the planner output under their first stage
+            planner = plan.get("stages", [{}])[0].get("$cursor", {}).get("queryPlanner", {})
+        slow_query_logger.warning(
+            "Plan for slow %s on %s.%s: %s", name, database_name, query[name], planner.get("winningPlan")
+        )
+
+
+class RequestProfiler:
+    """Pure ASGI middleware that cProfiles selected requests into output_dir.
+
+    A request is profiled when it carries the admin header with the configured
+    token, or when it is picked by sample_rate. Only one profile runs at a
+    time; the profile covers the whole event loop thread, so concurrent
+    requests show up in it as well.
+    """
+
+    header = "X-Profile"
+
+    def __init__(self, app, output_dir: Path, sample_rate: float = 0.0, admin_token: Optional[str] = None):
+        self.app = app
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.admin_token = admin_token
+        self._active = False
+
+    def should_profile(self, scope) -> bool:
+        if self._active:
+            return False
+        if self.admin_token:
+            supplied = Headers(scope=scope).get(self.header, "")
+            # Constant-time: the token grants profiling of production requests
+            if hmac.compare_digest(supplied.encode(), self.admin_token.encode()):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:12]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Profile-Id"] = profile_id
+            await send(message)
+
+        self._active = True
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.disable()
+            self._active = False
+
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_")
+        path = self.output_dir / f"{datetime.utcnow():%Y%m%dT%H%M%S}-{scope['method']}-{slug}-{profile_id}.prof"
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(str(path))
+        logger.info("Saved request profile %s", path)
@@ -0,0 +1,154 @@
+"""Response encodings: MessagePack negotiation and gzip/brotli compression."""
+import zlib
+from contextvars import ContextVar
+from typing import Dict
+
+import brotli
+import msgpack
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+COMPRESSIBLE_TYPES = ("application/json", MSGPACK_MEDIA_TYPE, "text/")
+
+msgpack_requested: ContextVar[bool] = ContextVar("msgpack_requested", default=False)
+
+
+def header_qualities(value: str) -> Dict[str, float]:
+    """Map each entry of an Accept-style header to its q-value (1.0 when omitted)."""
+    qualities = {}
+    for part in value.split(","):
+        token, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, q = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(q)
+                except ValueError:
+                    quality = 0.0
+        if token:
+            qualities[token.lower()] = quality
+    return qualities
+
+
+def accepts_msgpack(accept: str) -> bool:
+    qualities = header_qualities(accept)
+    return any(qualities.get(media_type, 0) > 0 for media_type in (MSGPACK_MEDIA_TYPE, "application/x-msgpack"))
+
+
+class NegotiatedResponse(JSONResponse):
+    """JSON by default, MessagePack when the request's Accept header asks for it."""
+
+    def __init__(self, content, status_code: int = 200, headers=None, media_type=None, background=None):
+        super().__init__(content, status_code, headers, media_type, background)
+        self.headers.append("Vary", "Accept")
+
+    def render(self, content) -> bytes:
+        if msgpack_requested.get():
+            self.media_type = MSGPACK_MEDIA_TYPE
+            return msgpack.packb(content, use_bin_type=True)
+        return super().render(content)
+
+
+def choose_encoding(accept_encoding: str):
+    """Pick br or gzip from Accept-Encoding, skipping codings refused with q=0."""
+    qualities = header_qualities(accept_encoding)
+    wildcard = qualities.get("*", 0.0)
+    # Highest q wins; max() keeps the first on a tie, so br beats gzip
+    quality, coding = max(((qualities.get(coding, wildcard), coding) for coding in ("br", "gzip")), key=lambda c: c[0])
+    return coding if quality > 0 else None
+
+
+def compressor(encoding: str):
+    """Return (compress, flush) callables for an incremental encoder.
+
+    Low levels on purpose: these are per-request dynamic payloads.
+    """
+    if encoding == "br":
+        encoder = brotli.Compressor(quality=4)
+        return encoder.process, encoder.finish
+    encoder = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    return encoder.compress, encoder.flush
+
+
+class ResponseEncodingMiddleware:
+    """Pure ASGI middleware that records MessagePack negotiation and compresses
+    responses of at least minimum_size bytes.
+
+    The size comes from Content-Length, or from the body itself when it arrives
+    in one message; bodies of unknown length are always compressed.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        token = msgpack_requested.set(accepts_msgpack(request_headers.get("accept", "")))
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+        try:
+            if encoding is None:
+                await self.app(scope, receive, send)
+            else:
+                await self.app(scope, receive, self.compressing_send(send, encoding))
+        finally:
+            msgpack_requested.reset(token)
+
+    def compressing_send(self, send, encoding: str):
+        start_message = None
+        encode = None
+
+        async def send_wrapper(message):
+            nonlocal start_message, encode
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                # First body chunk: decide once for the whole response
+                headers = MutableHeaders(scope=start_message)
+                if "content-length" in headers:
+                    size = int(headers["content-length"])
+                else:
+                    size = len(body) if not more_body else None
+                if (
+                    (size is None or size >= self.minimum_size)
+                    and "content-encoding" not in headers
+                    and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                ):
+                    compress, flush = compressor(encoding)
+                    encode = (compress, flush)
+                    headers["Content-Encoding"] = encoding
+                    headers.append("Vary", "Accept-Encoding")
+                    etag = headers.get("etag")
+                    if etag and not etag.startswith("W/"):
+                        # A strong validator promises identical bytes, which the encoded body is not
+                        headers["ETag"] = "W/" + etag
+                    if more_body:
+                        del headers["Content-Length"]
+                        body = compress(body)
+                    else:
+                        body = compress(body) + flush()
+                        headers["Content-Length"] = str(len(body))
+                        encode = None
+                    message = {**message, "body": body}
+                await send(start_message)
+                start_message = None
+            elif encode is not None:
+                compress, flush = encode
+                body = compress(body) + (b"" if more_body else flush())
+                message = {**message, "body": body}
+            await send(message)
+
+        return send_wrapper
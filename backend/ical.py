@@ -0,0 +1,80 @@
+"""iCalendar (RFC 5545) rendering for the per-user calendar feed."""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+PRODID = "-//Wedding Planner//Calendar Feed//EN"
+
+
+def escape_text(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def fold(line: str) -> str:
+    # Content lines are limited to 75 octets; continuations start with a space
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Never split inside a multi-byte UTF-8 sequence
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode("utf-8"))
+        start, limit = end, 74
+    return "\r\n ".join(parts)
+
+
+def format_date(value: datetime) -> str:
+    return value.strftime("%Y%m%d")
+
+
+def format_timestamp(value: datetime) -> str:
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def all_day_event(uid: str, day: datetime, summary: str, stamp: datetime, description: Optional[str] = None) -> List[str]:
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{format_timestamp(stamp)}",
+        f"DTSTART;VALUE=DATE:{format_date(day)}",
+        f"DTEND;VALUE=DATE:{format_date(day + timedelta(days=1))}",
+        f"SUMMARY:{escape_text(summary)}",
+    ]
+    if description:
+        lines.append(f"DESCRIPTION:{escape_text(description)}")
+    lines.append("END:VEVENT")
+    return lines
+
+
+def render_calendar(user: Dict, tasks: List[Dict], generated_at: datetime) -> bytes:
+    """Render the wedding date and every task with a due date as all-day events."""
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape_text(user['full_name'])} wedding planner",
+    ]
+    if user.get("wedding_date"):
+        couple = " & ".join(name for name in (user["full_name"], user.get("partner_name")) if name)
+        lines += all_day_event(
+            f"wedding-{user['id']}@wedding-planner", user["wedding_date"],
+            f"Wedding day - {couple}", user.get("created_at") or generated_at
+        )
+    for task in tasks:
+        if not task.get("due_date"):
+            continue
+        summary = ("[done] " if task.get("completed") else "") + task["title"]
+        details = [task.get("description"), f"Category: {task.get('category')}", f"Priority: {task.get('priority')}"]
+        lines += all_day_event(
+            f"task-{task['id']}@wedding-planner", task["due_date"], summary,
+            task.get("updated_at") or generated_at, "\n".join(d for d in details if d)
+        )
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(fold(line) for line in lines) + "\r\n").encode("utf-8")
@@ -0,0 +1,189 @@
+"""Report rendering for the report job API.
+
+Everything in this module runs inside ProcessPoolExecutor workers, so it only
+works on plain rows handed over by server.py and never touches MongoDB.
+"""
+import csv
+import io
+import os
+import time
+from pathlib import Path
+from typing import Dict, List
+
+REPORT_FORMATS = ("csv", "pdf")
+# Leading characters that make Excel/Sheets evaluate a cell as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+# report_type -> (collection, [(field, heading), ...])
+REPORT_COLUMNS = {
+    "budget": ("budgets", [
+        ("category", "Category"),
+        ("planned_amount", "Planned"),
+        ("spent_amount", "Spent"),
+        ("vendor", "Vendor"),
+        ("notes", "Notes"),
+    ]),
+    "guests": ("guests", [
+        ("name", "Name"),
+        ("email", "Email"),
+        ("phone", "Phone"),
+        ("rsvp_status", "RSVP"),
+        ("plus_one", "Plus one"),
+        ("dietary_restrictions", "Dietary"),
+        ("group", "Group"),
+    ]),
+    "vendors": ("vendors", [
+        ("name", "Name"),
+        ("category", "Category"),
+        ("contact_person", "Contact"),
+        ("phone", "Phone"),
+        ("email", "Email"),
+        ("price_quote", "Quote"),
+        ("rating", "Rating"),
+        ("status", "Status"),
+    ]),
+}
+
+# Landscape letter, Courier 8pt: 0.6em per glyph leaves room for ~150 columns
+PAGE_WIDTH = 792
+PAGE_HEIGHT = 612
+MARGIN = 36
+FONT_SIZE = 8
+LINE_HEIGHT = 10
+LINE_CHARS = int((PAGE_WIDTH - 2 * MARGIN) / (FONT_SIZE * 0.6))
+LINES_PER_PAGE = int((PAGE_HEIGHT - 2 * MARGIN) / LINE_HEIGHT)
+
+
+def format_cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value).replace("\n", " ")
+
+
+def report_table(report_type: str, rows: List[Dict]) -> List[List[str]]:
+    columns = REPORT_COLUMNS[report_type][1]
+    table = [[heading for _, heading in columns]]
+    table.extend([format_cell(row.get(field)) for field, _ in columns] for row in rows)
+    if report_type == "budget":
+        planned = sum(row.get("planned_amount") or 0 for row in rows)
+        spent = sum(row.get("spent_amount") or 0 for row in rows)
+        table.append(["Total", format_cell(float(planned)), format_cell(float(spent)), "", ""])
+    return table
+
+
+def csv_safe(cell: str) -> str:
+    """Defuse spreadsheet formulas (CSV injection) in guest-supplied text.
+
+    Plain numbers such as a negative amount are left alone so they stay numeric.
+    """
+    if not cell.startswith(FORMULA_PREFIXES):
+        return cell
+    try:
+        float(cell)
+        return cell
+    except ValueError:
+        return "'" + cell
+
+
+def render_csv(table: List[List[str]]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([csv_safe(cell) for cell in row] for row in table)
+    return buffer.getvalue().encode("utf-8")
+
+
+def text_lines(title: str, table: List[List[str]]) -> List[str]:
+    # Fixed-width columns, each capped so a full row fits on one line
+    cap = max(8, LINE_CHARS // len(table[0]) - 2)
+    widths = [min(cap, max(len(row[i]) for row in table)) for i in range(len(table[0]))]
+    lines = [title, ""]
+    for index, row in enumerate(table):
+        lines.append("  ".join(cell[:width].ljust(width) for cell, width in zip(row, widths)).rstrip())
+        if index == 0:
+            lines.append("  ".join("-" * width for width in widths))
+    return lines
+
+
+def pdf_escape(text: str) -> bytes:
+    text = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return text.encode("latin-1", "replace")
+
+
+def render_pdf(title: str, table: List[List[str]]) -> bytes:
+    lines = text_lines(title, table)
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+
+    # Object 1: catalog, 2: page tree, 3: font, then a (page, content) pair per page
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>",
+    ]
+    page_refs = []
+    for page_lines in pages:
+        stream = b"BT /F1 %d Tf %d TL %d %d Td " % (
+            FONT_SIZE, LINE_HEIGHT, MARGIN, PAGE_HEIGHT - MARGIN - FONT_SIZE
+        )
+        stream += b"".join(b"(" + pdf_escape(line) + b") Tj T* " for line in page_lines)
+        stream += b"ET"
+        page_number = len(objects) + 1
+        page_refs.append(b"%d 0 R" % page_number)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % (PAGE_WIDTH, PAGE_HEIGHT, page_number + 1)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[1] = b"<< /Type /Pages /Kids [" + b" ".join(page_refs) + b"] /Count %d >>" % len(pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def render_report(report_type: str, report_format: str, title: str, rows: List[Dict], output_path: str) -> str:
+    """Render rows to output_path and return the path.
+
+    The file is written under a temporary name and renamed, so a concurrent
+    job for the same cache key never observes a half-written report.
+    """
+    path = Path(output_path)
+    if path.exists():
+        # Reuse restarts the retention clock, see prune_reports
+        path.touch()
+        return output_path
+    table = report_table(report_type, rows)
+    if report_format == "csv":
+        content = render_csv(table)
+    else:
+        content = render_pdf(title, table)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+    tmp_path.write_bytes(content)
+    tmp_path.replace(path)
+    return output_path
+
+
+def prune_reports(directory: str, max_age_seconds: float) -> int:
+    """Delete report files (and stray temp files) not written or reused for max_age_seconds."""
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for path in Path(directory).glob("*"):
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            # A concurrent prune of the same directory got there first
+            continue
+    return removed
@@ -0,0 +1,241 @@
+"""Synthetic data generator for scale testing.
+
+Writes users with budgets, guests, vendors, tasks and venues straight to
+MongoDB with batched insert_many calls running concurrently:
+
+    python seed.py --users 100000 --guests-per-user 300
+
+Every seeded user can log in with the --password given (default
+"password123").
+"""
+import asyncio
+import random
+import re
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import typer
+
+import server
+from server import Budget, Guest, Task, User, Vendor, Venue
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Jon", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "William",
+    "Elizabeth", "David", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Charles",
+    "Karen", "Daniel", "Nancy", "Matthew", "Lisa", "Anthony", "Betty", "Mark", "Margaret", "Priya",
+    "Arjun", "Wei", "Mei", "Carlos", "Sofia", "Ahmed", "Fatima", "Liam", "Emma", "Noah", "Olivia",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark", "Lewis", "Robinson", "Walker",
+    "Patel", "Sharma", "Chen", "Wang", "Nguyen", "Kim", "Khan", "Ali", "O'Brien", "Murphy",
+]
+GROUPS = ["Family", "Friends", "Work", "Bride's family", "Groom's family", "Neighbors", None]
+DIETARY = [None] * 14 + ["Vegetarian", "Vegan", "Gluten free", "Nut allergy", "Halal", "Kosher", "veggie, GF"]
+RSVP_WEIGHTS = {"pending": 5, "accepted": 4, "declined": 1}
+BUDGET_CATEGORIES = [
+    "Venue", "Catering", "Photography", "Videography", "Flowers", "Music", "Attire", "Rings",
+    "Invitations", "Decor", "Transportation", "Cake", "Favors", "Hair & Makeup", "Officiant",
+]
+VENDOR_CATEGORIES = ["photographer", "florist", "caterer", "dj", "band", "baker", "planner", "videographer"]
+VENDOR_STATUSES = ["researching", "contacted", "quoted", "booked"]
+TASK_CATEGORIES = ["planning", "venue", "guests", "attire", "vendors", "ceremony", "reception", "honeymoon"]
+TASK_VERBS = ["Book", "Confirm", "Call", "Review", "Order", "Pay deposit for", "Finalize", "Schedule"]
+VENUE_TYPES = ["church", "reception", "outdoor", "hotel", "barn", "beach"]
+VENUE_STATUSES = ["considering", "visited", "booked"]
+CITIES = ["Springfield", "Riverside", "Franklin", "Greenville", "Bristol", "Fairview", "Salem", "Madison"]
+NOTES = [
+    None, None, "Follow up next week", "Waiting on quote",
+    "Prefers email over phone. Asked about weekend availability and parking for elderly guests.",
+]
+
+app = typer.Typer(help="Seed MongoDB with synthetic wedding-planner data.")
+
+
+def person_name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def phone(rng: random.Random) -> str:
+    return f"555-{rng.randrange(1000):03d}-{rng.randrange(10000):04d}"
+
+
+def seeded_id(rng: random.Random) -> str:
+    # Same shape as the models' uuid4 ids, but reproducible from --seed
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def location_near(rng: random.Random, center, spread_km: float = 40):
+    # ~111 km per degree of latitude; close enough for synthetic data
+    return {"type": "Point", "coordinates": [
+        round(center[0] + rng.uniform(-spread_km, spread_km) / 111, 6),
+        round(center[1] + rng.uniform(-spread_km, spread_km) / 111, 6),
+    ]}
+
+
+def user_documents(rng: random.Random, index: int, counts: Dict[str, int], hashed_password: str, domain: str):
+    now = datetime.utcnow()
+    created_at = now - timedelta(days=rng.randrange(1, 365))
+    wedding_date = now + timedelta(days=rng.randrange(30, 540))
+    # Each couple shops around one metro area somewhere in the continental US
+    center = (rng.uniform(-122, -72), rng.uniform(30, 47))
+    user = User(
+        id=seeded_id(rng),
+        email=f"seed{index}@{domain}",
+        full_name=person_name(rng),
+        partner_name=person_name(rng),
+        hashed_password=hashed_password,
+        wedding_date=wedding_date,
+        created_at=created_at,
+    )
+
+    def stamps():
+        stamp = created_at + timedelta(seconds=rng.randrange(int((now - created_at).total_seconds())))
+        return {"created_at": stamp, "updated_at": stamp}
+
+    docs = {"users": [user.dict()], "budgets": [], "guests": [], "vendors": [], "tasks": [], "venues": []}
+    for category in rng.sample(BUDGET_CATEGORIES, min(counts["budgets"], len(BUDGET_CATEGORIES))):
+        planned = round(rng.uniform(200, 15000), -1)
+        docs["budgets"].append(Budget(
+            id=seeded_id(rng), user_id=user.id, category=category, planned_amount=planned,
+            spent_amount=round(planned * rng.choice([0, 0, 0.25, 0.5, 1.0]), 2),
+            notes=rng.choice(NOTES), **stamps(),
+        ).dict())
+    statuses, weights = zip(*RSVP_WEIGHTS.items())
+    for _ in range(counts["guests"]):
+        name = person_name(rng)
+        docs["guests"].append(Guest(
+            id=seeded_id(rng), user_id=user.id, name=name,
+            email=f"{name.lower().replace(' ', '.').replace(chr(39), '')}{rng.randrange(100)}@example.com" if rng.random() < 0.7 else None,
+            phone=phone(rng) if rng.random() < 0.6 else None,
+            rsvp_status=rng.choices(statuses, weights)[0],
+            dietary_restrictions=rng.choice(DIETARY),
+            plus_one=rng.random() < 0.3,
+            group=rng.choice(GROUPS), **stamps(),
+        ).dict())
+    for _ in range(counts["vendors"]):
+        docs["vendors"].append(Vendor(
+            id=seeded_id(rng), user_id=user.id, name=f"{rng.choice(LAST_NAMES)} {rng.choice(VENDOR_CATEGORIES).title()}s",
+            category=rng.choice(VENDOR_CATEGORIES), contact_person=person_name(rng), phone=phone(rng),
+            address=f"{rng.randrange(1, 999)} Main St, {rng.choice(CITIES)}",
+            location=location_near(rng, center) if rng.random() < 0.8 else None,
+            price_quote=round(rng.uniform(300, 8000), -1) if rng.random() < 0.7 else None,
+            rating=rng.randint(1, 5) if rng.random() < 0.5 else None,
+            status=rng.choice(VENDOR_STATUSES), notes=rng.choice(NOTES), **stamps(),
+        ).dict())
+    for _ in range(counts["tasks"]):
+        category = rng.choice(TASK_CATEGORIES)
+        docs["tasks"].append(Task(
+            id=seeded_id(rng), user_id=user.id, title=f"{rng.choice(TASK_VERBS)} {category}", category=category,
+            due_date=wedding_date - timedelta(days=rng.randrange(1, 300)) if rng.random() < 0.8 else None,
+            completed=rng.random() < 0.4, priority=rng.choice(["low", "medium", "high"]),
+            notes=rng.choice(NOTES), **stamps(),
+        ).dict())
+    for _ in range(counts["venues"]):
+        docs["venues"].append(Venue(
+            id=seeded_id(rng), user_id=user.id, name=f"The {rng.choice(LAST_NAMES)} {rng.choice(['Hall', 'Gardens', 'Estate', 'Chapel'])}",
+            venue_type=rng.choice(VENUE_TYPES),
+            address=f"{rng.randrange(1, 999)} Oak Ave, {rng.choice(CITIES)}",
+            location=location_near(rng, center),
+            capacity=rng.choice([80, 120, 150, 200, 250, 400]), price=round(rng.uniform(2000, 30000), -2),
+            rating=rng.randint(1, 5) if rng.random() < 0.5 else None,
+            status=rng.choice(VENUE_STATUSES), notes=rng.choice(NOTES), **stamps(),
+        ).dict())
+    return docs
+
+
+async def insert_worker(queue: asyncio.Queue, inserted: Dict[str, int]):
+    while True:
+        name, batch = await queue.get()
+        try:
+            await server.db[name].insert_many(batch, ordered=False)
+            inserted[name] = inserted.get(name, 0) + len(batch)
+        except Exception as e:
+            typer.echo(f"insert into {name} failed: {e}", err=True)
+        finally:
+            queue.task_done()
+
+
+async def seed_database(users: int, counts: Dict[str, int], batch_size: int, concurrency: int,
+                        seed: int, password: str, domain: str, create_indexes: bool):
+    # users.email has no unique index, so a second run would duplicate every seeded user
+    existing = await server.db.users.find_one(
+        {"email": {"$regex": f"^seed\\d+@{re.escape(domain)}$"}}, {"_id": 0, "email": 1}
+    )
+    if existing is not None:
+        typer.echo(f"{existing['email']} already exists; seed into another --email-domain", err=True)
+        raise typer.Exit(1)
+
+    rng = random.Random(seed)
+    # One bcrypt hash shared by every seeded user; hashing per user would dominate the run
+    hashed_password = server.get_password_hash(password)
+    # Bulk inserts would flood the slow-query log
+    server.slow_query_listener.threshold_ms = float("inf")
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    inserted: Dict[str, int] = {}
+    workers = [asyncio.create_task(insert_worker(queue, inserted)) for _ in range(concurrency)]
+    buffers: Dict[str, List[Dict]] = {}
+    started = time.perf_counter()
+
+    for index in range(users):
+        for name, docs in user_documents(rng, index, counts, hashed_password, domain).items():
+            buffer = buffers.setdefault(name, [])
+            buffer.extend(docs)
+            if len(buffer) >= batch_size:
+                await queue.put((name, buffer))
+                buffers[name] = []
+        if (index + 1) % 1000 == 0:
+            typer.echo(f"generated {index + 1}/{users} users ({time.perf_counter() - started:.1f}s)")
+    for name, buffer in buffers.items():
+        if buffer:
+            await queue.put((name, buffer))
+    await queue.join()
+    for worker in workers:
+        worker.cancel()
+
+    elapsed = time.perf_counter() - started
+    total = sum(inserted.values())
+    typer.echo(f"inserted {total} documents in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} docs/s)")
+    for name, count in sorted(inserted.items()):
+        typer.echo(f"  {name}: {count}")
+
+    # Building indexes once after the load is cheaper than maintaining them per insert
+    if create_indexes:
+        await server.startup_db_client()
+        typer.echo("indexes created")
+
+
+@app.command()
+def main(
+    users: int = typer.Option(1000, help="Number of users to create"),
+    guests_per_user: int = typer.Option(150, help="Guests per user"),
+    budgets_per_user: int = typer.Option(10, help="Budget items per user (at most one per category)"),
+    vendors_per_user: int = typer.Option(12, help="Vendors per user"),
+    tasks_per_user: int = typer.Option(40, help="Tasks per user"),
+    venues_per_user: int = typer.Option(5, help="Venues per user"),
+    batch_size: int = typer.Option(1000, help="Documents per insert_many call"),
+    concurrency: int = typer.Option(8, help="insert_many calls in flight"),
+    seed: int = typer.Option(0, help="Random seed; the same seed gives the same ids and data, with dates relative to now"),
+    password: str = typer.Option("password123", help="Password for every seeded user"),
+    email_domain: str = typer.Option("seed.example.com", help="Domain of seeded user emails"),
+    create_indexes: bool = typer.Option(True, help="Create the API's indexes after loading"),
+):
+    counts = {
+        "budgets": budgets_per_user,
+        "guests": guests_per_user,
+        "vendors": vendors_per_user,
+        "tasks": tasks_per_user,
+        "venues": venues_per_user,
+    }
+    asyncio.run(seed_database(
+        users, counts, batch_size, concurrency, seed, password, email_domain, create_indexes
+    ))
+    server.client.close()
+
+
+if __name__ == "__main__":
+    app()
@@ -1,26 +1,46 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, status
+from fastapi.responses import FileResponse, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
+import hashlib
+import json
 import logging
+import multiprocessing
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, EmailStr, TypeAdapter, create_model, field_validator
+from typing import List, Optional, Dict, Any, Literal, get_args
 import uuid
-from datetime import datetime, timedelta
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from concurrent.futures import ProcessPoolExecutor
 from passlib.context import CryptContext
 import jwt
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure
 import bcrypt
 
+from diagnostics import RequestProfiler, SlowQueryListener
+from dedup import find_duplicates
+from encoding import NegotiatedResponse, ResponseEncodingMiddleware, msgpack_requested
+from ical import render_calendar
+from reports import REPORT_COLUMNS, REPORT_FORMATS, prune_reports, render_report
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+slow_query_listener = SlowQueryListener(float(os.environ.get('SLOW_QUERY_MS', '100')))
+client = AsyncIOMotorClient(mongo_url, event_listeners=[slow_query_listener])
+slow_query_listener.client = client
 db = client[os.environ['DB_NAME']]
 
 # Security
@@ -30,6 +50,21 @@ SECRET_KEY = "your-secret-key-here"  # In production, use environment variable
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Soft-deleted documents are purged by a TTL index on deleted_at after this window
+SOFT_DELETE_RETENTION_DAYS = int(os.environ.get('SOFT_DELETE_RETENTION_DAYS', '30'))
+
+# Sync high-water marks trail the server clock so in-flight writes are not skipped
+SYNC_OVERLAP_SECONDS = 5
+
+# Report jobs render in a bounded process pool and are cached on disk
+REPORTS_DIR = Path(os.environ.get('REPORTS_DIR', ROOT_DIR / 'reports'))
+REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS', '2'))
+# A queued or running job older than this is presumed lost (e.g. to a restart)
+REPORT_JOB_LEASE_MINUTES = int(os.environ.get('REPORT_JOB_LEASE_MINUTES', '15'))
+REPORT_RETENTION_HOURS = int(os.environ.get('REPORT_RETENTION_HOURS', '24'))
+report_pool: Optional[ProcessPoolExecutor] = None
+report_tasks = set()
+
 # Create the main app
 app = FastAPI(title="Wedding Planner API")
 api_router = APIRouter(prefix="/api")
@@ -68,6 +103,7 @@ class Budget(BaseModel):
     vendor: Optional[str] = None
     notes: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 class BudgetCreate(BaseModel):
     category: str
@@ -86,6 +122,7 @@ class Guest(BaseModel):
     plus_one: bool = False
     group: Optional[str] = None  # family, friends, work, etc.
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 class GuestCreate(BaseModel):
     name: str
@@ -96,6 +133,61 @@ class GuestCreate(BaseModel):
     plus_one: bool = False
     group: Optional[str] = None
 
+class GuestDuplicate(BaseModel):
+    guest_ids: List[str]
+    primary_id: str
+    score: float
+
+class GuestImportResult(BaseModel):
+    created: List[Guest]
+    skipped: int
+    duplicates: List[GuestDuplicate]
+
+class GuestMerge(BaseModel):
+    primary_id: str
+    duplicate_ids: List[str]
+
+class ManifestRow(BaseModel):
+    group: str
+    dietary: List[str]
+    guests: int
+    plus_ones: int
+    confirmed: int  # headcount of accepted guests incl. plus ones
+    pending: int
+
+class CateringManifest(BaseModel):
+    headcount: int
+    confirmed: int
+    pending: int
+    by_group: Dict[str, int]
+    by_dietary: Dict[str, int]
+    rows: List[ManifestRow]
+
+RSVPStatus = Literal["pending", "accepted", "declined"]
+
+class RSVPUpdate(BaseModel):
+    # Submitted by guests without an account, so the free text is bounded
+    rsvp_status: RSVPStatus
+    plus_one: Optional[bool] = None
+    dietary_restrictions: Optional[str] = Field(None, max_length=200)
+
+class RSVPLink(BaseModel):
+    guest_id: str
+    token: str
+    url: str
+
+class GeoPoint(BaseModel):
+    type: Literal["Point"] = "Point"
+    coordinates: List[float] = Field(min_length=2, max_length=2)  # [longitude, latitude]
+
+    @field_validator("coordinates")
+    @classmethod
+    def check_range(cls, coordinates):
+        lng, lat = coordinates
+        if not (-180 <= lng <= 180 and -90 <= lat <= 90):
+            raise ValueError("coordinates must be [longitude, latitude]")
+        return coordinates
+
 class Vendor(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_id: str
@@ -105,11 +197,13 @@ class Vendor(BaseModel):
     email: Optional[EmailStr] = None
     phone: Optional[str] = None
     address: Optional[str] = None
+    location: Optional[GeoPoint] = None
     price_quote: Optional[float] = None
     rating: Optional[int] = None  # 1-5
     status: str = "researching"  # researching, contacted, quoted, booked
     notes: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 class VendorCreate(BaseModel):
     name: str
@@ -118,6 +212,7 @@ class VendorCreate(BaseModel):
     email: Optional[EmailStr] = None
     phone: Optional[str] = None
     address: Optional[str] = None
+    location: Optional[GeoPoint] = None
     price_quote: Optional[float] = None
     rating: Optional[int] = None
     status: str = "researching"
@@ -135,6 +230,7 @@ class Task(BaseModel):
     assigned_to: Optional[str] = None
     notes: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 class TaskCreate(BaseModel):
     title: str
@@ -151,6 +247,7 @@ class Venue(BaseModel):
     name: str
     venue_type: str  # church, reception, outdoor, etc.
     address: str
+    location: Optional[GeoPoint] = None
     capacity: Optional[int] = None
     price: Optional[float] = None
     rating: Optional[int] = None
@@ -160,11 +257,13 @@ class Venue(BaseModel):
     email: Optional[EmailStr] = None
     notes: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 class VenueCreate(BaseModel):
     name: str
     venue_type: str
     address: str
+    location: Optional[GeoPoint] = None
     capacity: Optional[int] = None
     price: Optional[float] = None
     rating: Optional[int] = None
@@ -174,6 +273,54 @@ class VenueCreate(BaseModel):
     email: Optional[EmailStr] = None
     notes: Optional[str] = None
 
+class NearbyVenue(Venue):
+    distance_km: float
+
+class NearbyVendor(Vendor):
+    distance_km: float
+
+class SyncResponse(BaseModel):
+    full_resync: bool
+    high_water_mark: datetime
+    budgets: List[Budget]
+    guests: List[Guest]
+    vendors: List[Vendor]
+    tasks: List[Task]
+    venues: List[Venue]
+    deleted: Dict[str, List[str]]  # collection -> ids of tombstoned records
+
+class AnalyticsSnapshot(BaseModel):
+    day: datetime
+    guests_total: int = 0
+    guests_accepted: int = 0
+    guests_declined: int = 0
+    guests_pending: int = 0
+    tasks_total: int = 0
+    tasks_completed: int = 0
+    budget_planned: float = 0.0
+    budget_spent: float = 0.0
+    vendors_total: int = 0
+    vendors_booked: int = 0
+
+class CalendarLink(BaseModel):
+    token: str
+    url: str
+
+class ReportJobCreate(BaseModel):
+    report_type: str  # budget, guests, vendors
+    format: str = "csv"  # csv, pdf
+
+class ReportJob(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: str
+    report_type: str
+    format: str
+    status: str = "queued"  # queued, running, done, failed
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
 # Auth functions
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -205,6 +352,144 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         raise HTTPException(status_code=401, detail="User not found")
     return User(**user)
 
+# RSVP helpers
+RSVP_STATUSES = get_args(RSVPStatus)
+
+def create_rsvp_token(guest_id: str, user_id: str):
+    # No expiry: invitation links must keep working until the wedding
+    return jwt.encode({"sub": guest_id, "uid": user_id, "scope": "rsvp"}, SECRET_KEY, algorithm=ALGORITHM)
+
+def decode_rsvp_token(token: str):
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=404, detail="Invalid RSVP link")
+    if payload.get("scope") != "rsvp" or not payload.get("sub") or not payload.get("uid"):
+        raise HTTPException(status_code=404, detail="Invalid RSVP link")
+    return payload["sub"], payload["uid"]
+
+def empty_rsvp_counts() -> Dict[str, int]:
+    return {"total": 0, **{status: 0 for status in RSVP_STATUSES}}
+
+async def count_rsvps(user_id: str) -> Dict[str, int]:
+    counts = empty_rsvp_counts()
+    async for row in db.guests.aggregate([
+        {"$match": {"user_id": user_id, "deleted_at": None}},
+        {"$group": {"_id": "$rsvp_status", "count": {"$sum": 1}}},
+    ]):
+        counts["total"] += row["count"]
+        if row["_id"] in RSVP_STATUSES:
+            counts[row["_id"]] += row["count"]
+    return counts
+
+async def recount_rsvp_counts(user_id: str, attempts: int = 3) -> Optional[Dict[str, int]]:
+    """Rebuild a user's counters from the guests collection, overwriting any drift.
+
+    Every counter write bumps version. The recount only lands if the version it
+    read before aggregating is still current, so an $inc that raced with the
+    aggregation is never overwritten; the recount is retried instead. Returns
+    None if every attempt lost the race.
+    """
+    for _ in range(attempts):
+        current = await db.guest_counters.find_one({"user_id": user_id}, {"_id": 0, "version": 1})
+        # None also matches counters written before they were versioned
+        version = current.get("version") if current is not None else None
+        counts = await count_rsvps(user_id)
+        if current is None:
+            try:
+                await db.guest_counters.insert_one({"user_id": user_id, **counts, "version": 1})
+                return counts
+            except DuplicateKeyError:
+                # Another writer created the document after our read
+                continue
+        result = await db.guest_counters.update_one(
+            {"user_id": user_id, "version": version}, {"$set": counts, "$inc": {"version": 1}}
+        )
+        if result.matched_count:
+            return counts
+    logger.warning("Gave up recounting RSVP counters for user %s", user_id)
+    return None
+
+async def apply_rsvp_delta(user_id: str, delta: Dict[str, int]):
+    delta = {k: v for k, v in delta.items() if v}
+    if not delta:
+        return
+    result = await db.guest_counters.update_one(
+        {"user_id": user_id}, {"$inc": {**delta, "version": 1}}
+    )
+    if result.matched_count == 0:
+        # Users created before the counters existed (or seeded in bulk) have no
+        # document yet: count from scratch, which already includes this change.
+        await recount_rsvp_counts(user_id)
+
+async def adjust_rsvp_counts(user_id: str, old_status: Optional[str] = None, new_status: Optional[str] = None, total: int = 0):
+    delta = {"total": total}
+    if old_status in RSVP_STATUSES:
+        delta[old_status] = -1
+    if new_status in RSVP_STATUSES:
+        delta[new_status] = delta.get(new_status, 0) + 1
+    await apply_rsvp_delta(user_id, delta)
+
+async def get_rsvp_counts(user_id: str):
+    counts = await db.guest_counters.find_one({"user_id": user_id}, {"_id": 0, "user_id": 0, "version": 0})
+    if counts is None:
+        # A recount that keeps losing races still yields a correct, if unsaved, answer
+        return await recount_rsvp_counts(user_id) or await count_rsvps(user_id)
+    return {**empty_rsvp_counts(), **counts}
+
+# Sparse fieldsets
+def parse_fields(fields: Optional[str], model) -> Optional[tuple]:
+    """Turn a ?fields=name,rsvp_status query value into a validated field tuple."""
+    if not fields:
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(unknown)}")
+    # id is always returned so clients can address the records
+    return tuple(dict.fromkeys(["id"] + requested))
+
+def fields_projection(fields: tuple) -> dict:
+    return {"_id": 0, **{name: 1 for name in fields}}
+
+@lru_cache(maxsize=256)
+def sparse_adapter(model, fields: tuple):
+    # Slimmed schema: only the requested fields, all optional
+    sparse_model = create_model(
+        f"{model.__name__}Fields",
+        **{name: (Optional[model.model_fields[name].annotation], None) for name in fields}
+    )
+    return TypeAdapter(List[sparse_model])
+
+def sparse_response(model, fields: tuple, docs: List[dict]) -> Response:
+    adapter = sparse_adapter(model, fields)
+    items = adapter.validate_python(docs)
+    if msgpack_requested.get():
+        return NegotiatedResponse(adapter.dump_python(items, mode="json"))
+    # Same URL as the MessagePack branch, so caches must key on Accept here too
+    return Response(adapter.dump_json(items), media_type="application/json", headers={"Vary": "Accept"})
+
+# Per-user response caches
+class VersionedLRU:
+    """In-process LRU of key -> (version, value); an entry only hits while its version is current."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str, version):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != version:
+            return None
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: str, version, value):
+        self.entries[key] = (version, value)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
 # Auth routes
 @api_router.post("/register", response_model=Token)
 async def register(user_data: UserCreate):
@@ -221,6 +506,8 @@ async def register(user_data: UserCreate):
     
     user = User(**user_dict)
     await db.users.insert_one(user.dict())
+    # Counters exist from the start so every RSVP $inc has a document to land on
+    await db.guest_counters.insert_one({"user_id": user.id, **empty_rsvp_counts(), "version": 0})
     
     # Create token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -254,19 +541,35 @@ async def create_budget(budget_data: BudgetCreate, current_user: User = Depends(
     await db.budgets.insert_one(budget.dict())
     return budget
 
-@api_router.get("/budget", response_model=List[Budget])
-async def get_budgets(current_user: User = Depends(get_current_user)):
-    budgets = await db.budgets.find({"user_id": current_user.id}).to_list(1000)
+@api_router.get("/budget", response_model=List[Budget], response_class=NegotiatedResponse)
+async def get_budgets(fields: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    selected = parse_fields(fields, Budget)
+    query = {"user_id": current_user.id, "deleted_at": None}
+    if selected:
+        budgets = await db.budgets.find(query, fields_projection(selected)).to_list(1000)
+        return sparse_response(Budget, selected, budgets)
+    budgets = await db.budgets.find(query).to_list(1000)
     return [Budget(**budget) for budget in budgets]
 
 @api_router.put("/budget/{budget_id}")
 async def update_budget(budget_id: str, budget_data: BudgetCreate, current_user: User = Depends(get_current_user)):
     await db.budgets.update_one(
-        {"id": budget_id, "user_id": current_user.id},
-        {"$set": budget_data.dict()}
+        {"id": budget_id, "user_id": current_user.id, "deleted_at": None},
+        {"$set": {**budget_data.dict(), "updated_at": datetime.utcnow()}}
     )
     return {"message": "Budget updated"}
 
+@api_router.delete("/budget/{budget_id}")
+async def delete_budget(budget_id: str, current_user: User = Depends(get_current_user)):
+    now = datetime.utcnow()
+    result = await db.budgets.update_one(
+        {"id": budget_id, "user_id": current_user.id, "deleted_at": None},
+        {"$set": {"deleted_at": now, "updated_at": now}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Budget not found")
+    return {"message": "Budget deleted"}
+
 # Guest routes
 @api_router.post("/guests", response_model=Guest)
 async def create_guest(guest_data: GuestCreate, current_user: User = Depends(get_current_user)):
@@ -274,21 +577,249 @@ async def create_guest(guest_data: GuestCreate, current_user: User = Depends(get
     guest_dict["user_id"] = current_user.id
     guest = Guest(**guest_dict)
     await db.guests.insert_one(guest.dict())
+    await adjust_rsvp_counts(current_user.id, new_status=guest.rsvp_status, total=1)
     return guest
 
-@api_router.get("/guests", response_model=List[Guest])
-async def get_guests(current_user: User = Depends(get_current_user)):
-    guests = await db.guests.find({"user_id": current_user.id}).to_list(1000)
+@api_router.get("/guests", response_model=List[Guest], response_class=NegotiatedResponse)
+async def get_guests(fields: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    selected = parse_fields(fields, Guest)
+    query = {"user_id": current_user.id, "deleted_at": None}
+    if selected:
+        guests = await db.guests.find(query, fields_projection(selected)).to_list(1000)
+        return sparse_response(Guest, selected, guests)
+    guests = await db.guests.find(query).to_list(1000)
     return [Guest(**guest) for guest in guests]
 
+# Catering manifest
+DIETARY_SYNONYMS = {
+    "veg": "vegetarian", "veggie": "vegetarian", "vegetarian": "vegetarian",
+    "vegan": "vegan", "plant based": "vegan",
+    "gf": "gluten-free", "gluten free": "gluten-free", "no gluten": "gluten-free", "celiac": "gluten-free", "coeliac": "gluten-free",
+    "df": "dairy-free", "dairy free": "dairy-free", "no dairy": "dairy-free", "lactose intolerant": "dairy-free",
+    "nut free": "nut-free", "nut allergy": "nut-free", "peanut allergy": "nut-free", "no nuts": "nut-free", "nuts": "nut-free",
+    "pescatarian": "pescatarian", "pescetarian": "pescatarian",
+    "halal": "halal", "kosher": "kosher",
+    "none": None, "no": None, "na": None, "nothing": None,
+}
+# user_id -> manifest, versioned by the latest guest updated_at
+manifest_cache = VersionedLRU(1024)
+
+def dietary_tags(text: str) -> List[str]:
+    tags = set()
+    text = text.lower().replace("n/a", "none")
+    for part in re.split(r"[,;/&+]|\band\b", text):
+        part = re.sub(r"[^a-z ]+", " ", part).strip()
+        part = re.sub(r"\s+", " ", part)
+        if part:
+            tag = DIETARY_SYNONYMS.get(part, part)
+            if tag:
+                tags.add(tag)
+    return sorted(tags)
+
+async def build_manifest(user_id: str):
+    # Mongo rolls guests up by (group, lowercased dietary text, status); only those
+    # few buckets come back and are folded into normalized tags here.
+    pipeline = [
+        {"$match": {"user_id": user_id, "deleted_at": None, "rsvp_status": {"$ne": "declined"}}},
+        {"$group": {
+            "_id": {
+                "group": {"$toLower": {"$ifNull": ["$group", ""]}},
+                "dietary": {"$toLower": {"$ifNull": ["$dietary_restrictions", ""]}},
+                "status": "$rsvp_status",
+            },
+            "guests": {"$sum": 1},
+            "plus_ones": {"$sum": {"$cond": ["$plus_one", 1, 0]}},
+        }},
+    ]
+    rows = {}
+    async for bucket in db.guests.aggregate(pipeline):
+        key = bucket["_id"]
+        group = (key.get("group") or "").strip() or "ungrouped"
+        tags = dietary_tags(key.get("dietary") or "")
+        row = rows.setdefault((group, tuple(tags)), {
+            "group": group, "dietary": tags, "guests": 0, "plus_ones": 0, "confirmed": 0, "pending": 0
+        })
+        headcount = bucket["guests"] + bucket["plus_ones"]
+        row["guests"] += bucket["guests"]
+        row["plus_ones"] += bucket["plus_ones"]
+        row["confirmed" if key.get("status") == "accepted" else "pending"] += headcount
+
+    manifest = {"headcount": 0, "confirmed": 0, "pending": 0, "by_group": {}, "by_dietary": {}, "rows": []}
+    for row in sorted(rows.values(), key=lambda r: (r["group"], r["dietary"])):
+        headcount = row["confirmed"] + row["pending"]
+        manifest["headcount"] += headcount
+        manifest["confirmed"] += row["confirmed"]
+        manifest["pending"] += row["pending"]
+        manifest["by_group"][row["group"]] = manifest["by_group"].get(row["group"], 0) + headcount
+        # A guest's restrictions are not assumed for their plus one
+        for tag in row["dietary"] or ["none"]:
+            manifest["by_dietary"][tag] = manifest["by_dietary"].get(tag, 0) + row["guests"]
+        if row["plus_ones"]:
+            manifest["by_dietary"]["none"] = manifest["by_dietary"].get("none", 0) + row["plus_ones"]
+        manifest["rows"].append(row)
+    return manifest
+
+@api_router.get("/guests/manifest", response_model=CateringManifest)
+async def get_guest_manifest(current_user: User = Depends(get_current_user)):
+    # Every guest write (including RSVPs and deletes) bumps updated_at, so the newest
+    # updated_at is a cheap index-only version stamp that is valid across workers.
+    latest = await db.guests.find_one(
+        {"user_id": current_user.id}, {"_id": 0, "updated_at": 1}, sort=[("updated_at", -1)]
+    )
+    stamp = latest.get("updated_at") if latest else None
+    manifest = manifest_cache.get(current_user.id, stamp)
+    if manifest is None:
+        manifest = await build_manifest(current_user.id)
+        manifest_cache.put(current_user.id, stamp, manifest)
+    return manifest
+
+# Only what duplicate scoring looks at is loaded for de-duplication
+DEDUP_PROJECTION = {"_id": 0, "id": 1, "name": 1, "email": 1, "phone": 1}
+MERGE_FIELDS = ("email", "phone", "dietary_restrictions", "group")
+
+@api_router.get("/guests/duplicates", response_model=List[GuestDuplicate])
+async def get_guest_duplicates(current_user: User = Depends(get_current_user)):
+    guests = await db.guests.find(
+        {"user_id": current_user.id, "deleted_at": None}, DEDUP_PROJECTION
+    ).to_list(None)
+    return find_duplicates(guests)
+
+@api_router.post("/guests/bulk", response_model=GuestImportResult)
+async def import_guests(guests_data: List[GuestCreate], skip_duplicates: bool = False, current_user: User = Depends(get_current_user)):
+    existing = await db.guests.find(
+        {"user_id": current_user.id, "deleted_at": None}, DEDUP_PROJECTION
+    ).to_list(None)
+    incoming = [Guest(user_id=current_user.id, **guest_data.dict()) for guest_data in guests_data]
+
+    # Only pairs involving an incoming row are scored; existing guests were checked before
+    # Incoming rows get the same projection as existing ones so they are compared like for like
+    duplicates = find_duplicates(
+        existing + [{field: getattr(guest, field) for field in DEDUP_PROJECTION if field != "_id"} for guest in incoming],
+        new_only_from=len(existing)
+    )
+    skipped_ids = set()
+    if skip_duplicates:
+        existing_ids = {guest["id"] for guest in existing}
+        for proposal in duplicates:
+            # The primary is an existing guest whenever the group has one, so it is always kept
+            skipped_ids.update(
+                i for i in proposal["guest_ids"] if i != proposal["primary_id"] and i not in existing_ids
+            )
+
+    created = [guest for guest in incoming if guest.id not in skipped_ids]
+    if created:
+        await db.guests.insert_many([guest.dict() for guest in created], ordered=False)
+        delta = {"total": len(created)}
+        for guest in created:
+            if guest.rsvp_status in RSVP_STATUSES:
+                delta[guest.rsvp_status] = delta.get(guest.rsvp_status, 0) + 1
+        await apply_rsvp_delta(current_user.id, delta)
+    return {"created": created, "skipped": len(skipped_ids), "duplicates": duplicates}
+
+@api_router.post("/guests/merge", response_model=Guest)
+async def merge_guests(merge_data: GuestMerge, current_user: User = Depends(get_current_user)):
+    duplicate_ids = [i for i in dict.fromkeys(merge_data.duplicate_ids) if i != merge_data.primary_id]
+    docs = await db.guests.find(
+        {"id": {"$in": [merge_data.primary_id] + duplicate_ids}, "user_id": current_user.id, "deleted_at": None}
+    ).to_list(None)
+    by_id = {doc["id"]: doc for doc in docs}
+    if len(by_id) != len(duplicate_ids) + 1:
+        raise HTTPException(status_code=404, detail="Guest not found")
+
+    primary = by_id[merge_data.primary_id]
+    old_status = primary.get("rsvp_status")
+    update = {}
+    for duplicate_id in duplicate_ids:
+        duplicate = by_id[duplicate_id]
+        for field in MERGE_FIELDS:
+            if not primary.get(field) and duplicate.get(field):
+                update[field] = primary[field] = duplicate[field]
+        if duplicate.get("plus_one") and not primary.get("plus_one"):
+            update["plus_one"] = primary["plus_one"] = True
+        # An answered RSVP wins over a pending one
+        if primary.get("rsvp_status") == "pending" and duplicate.get("rsvp_status") in ("accepted", "declined"):
+            update["rsvp_status"] = primary["rsvp_status"] = duplicate["rsvp_status"]
+
+    now = datetime.utcnow()
+    update["updated_at"] = primary["updated_at"] = now
+    await db.guests.update_one({"id": merge_data.primary_id, "user_id": current_user.id}, {"$set": update})
+    await db.guests.update_many(
+        {"id": {"$in": duplicate_ids}, "user_id": current_user.id, "deleted_at": None},
+        {"$set": {"deleted_at": now, "updated_at": now}}
+    )
+
+    delta = {"total": -len(duplicate_ids)}
+    for status_name in [old_status] + [by_id[i].get("rsvp_status") for i in duplicate_ids]:
+        if status_name in RSVP_STATUSES:
+            delta[status_name] = delta.get(status_name, 0) - 1
+    if primary.get("rsvp_status") in RSVP_STATUSES:
+        delta[primary["rsvp_status"]] = delta.get(primary["rsvp_status"], 0) + 1
+    await apply_rsvp_delta(current_user.id, delta)
+    return Guest(**primary)
+
 @api_router.put("/guests/{guest_id}")
 async def update_guest(guest_id: str, guest_data: GuestCreate, current_user: User = Depends(get_current_user)):
-    await db.guests.update_one(
-        {"id": guest_id, "user_id": current_user.id},
-        {"$set": guest_data.dict()}
+    previous = await db.guests.find_one_and_update(
+        {"id": guest_id, "user_id": current_user.id, "deleted_at": None},
+        {"$set": {**guest_data.dict(), "updated_at": datetime.utcnow()}},
+        projection={"rsvp_status": 1},
+        return_document=ReturnDocument.BEFORE
     )
+    if previous is not None:
+        await adjust_rsvp_counts(current_user.id, previous.get("rsvp_status"), guest_data.rsvp_status)
     return {"message": "Guest updated"}
 
+@api_router.delete("/guests/{guest_id}")
+async def delete_guest(guest_id: str, current_user: User = Depends(get_current_user)):
+    now = datetime.utcnow()
+    previous = await db.guests.find_one_and_update(
+        {"id": guest_id, "user_id": current_user.id, "deleted_at": None},
+        {"$set": {"deleted_at": now, "updated_at": now}},
+        projection={"rsvp_status": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    if previous is None:
+        raise HTTPException(status_code=404, detail="Guest not found")
+    await adjust_rsvp_counts(current_user.id, old_status=previous.get("rsvp_status"), total=-1)
+    return {"message": "Guest deleted"}
+
+@api_router.get("/guests/{guest_id}/rsvp-link", response_model=RSVPLink)
+async def get_rsvp_link(guest_id: str, current_user: User = Depends(get_current_user)):
+    guest = await db.guests.find_one({"id": guest_id, "user_id": current_user.id, "deleted_at": None}, {"_id": 1})
+    if guest is None:
+        raise HTTPException(status_code=404, detail="Guest not found")
+    token = create_rsvp_token(guest_id, current_user.id)
+    return {"guest_id": guest_id, "token": token, "url": f"/api/rsvp/{token}"}
+
+# Public RSVP routes (authenticated by the signed link, not by a user session)
+@api_router.get("/rsvp/{token}")
+async def get_rsvp(token: str):
+    guest_id, user_id = decode_rsvp_token(token)
+    guest = await db.guests.find_one(
+        {"id": guest_id, "user_id": user_id, "deleted_at": None},
+        {"_id": 0, "name": 1, "rsvp_status": 1, "plus_one": 1, "dietary_restrictions": 1}
+    )
+    if guest is None:
+        raise HTTPException(status_code=404, detail="Invalid RSVP link")
+    return guest
+
+@api_router.post("/rsvp/{token}")
+async def submit_rsvp(token: str, rsvp_data: RSVPUpdate):
+    guest_id, user_id = decode_rsvp_token(token)
+
+    # Single indexed read-modify-write on the guest; the returned pre-image
+    # gives the exact counter delta even when answers arrive concurrently.
+    previous = await db.guests.find_one_and_update(
+        {"id": guest_id, "user_id": user_id, "deleted_at": None},
+        {"$set": {**rsvp_data.dict(exclude_none=True), "updated_at": datetime.utcnow()}},
+        projection={"rsvp_status": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    if previous is None:
+        raise HTTPException(status_code=404, detail="Invalid RSVP link")
+    await adjust_rsvp_counts(user_id, previous.get("rsvp_status"), rsvp_data.rsvp_status)
+    return {"message": "RSVP recorded", "rsvp_status": rsvp_data.rsvp_status}
+
 # Vendor routes
 @api_router.post("/vendors", response_model=Vendor)
 async def create_vendor(vendor_data: VendorCreate, current_user: User = Depends(get_current_user)):
@@ -298,11 +829,44 @@ async def create_vendor(vendor_data: VendorCreate, current_user: User = Depends(
     await db.vendors.insert_one(vendor.dict())
     return vendor
 
-@api_router.get("/vendors", response_model=List[Vendor])
-async def get_vendors(current_user: User = Depends(get_current_user)):
-    vendors = await db.vendors.find({"user_id": current_user.id}).to_list(1000)
+@api_router.get("/vendors", response_model=List[Vendor], response_class=NegotiatedResponse)
+async def get_vendors(fields: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    selected = parse_fields(fields, Vendor)
+    query = {"user_id": current_user.id, "deleted_at": None}
+    if selected:
+        vendors = await db.vendors.find(query, fields_projection(selected)).to_list(1000)
+        return sparse_response(Vendor, selected, vendors)
+    vendors = await db.vendors.find(query).to_list(1000)
     return [Vendor(**vendor) for vendor in vendors]
 
+@api_router.get("/vendors/near", response_model=List[NearbyVendor], response_class=NegotiatedResponse)
+async def get_vendors_near(
+    lng: float, lat: float, max_km: float = 20, category: Optional[str] = None,
+    max_price: Optional[float] = None, skip: int = 0, limit: int = 20, fields: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    selected = parse_fields(fields, NearbyVendor)
+    query = {"user_id": current_user.id, "deleted_at": None}
+    if category is not None:
+        query["category"] = category
+    if max_price is not None:
+        query["price_quote"] = {"$lte": max_price}
+    vendors = await geo_near(db.vendors, lng, lat, max_km, query, skip, limit, selected)
+    if selected:
+        return sparse_response(NearbyVendor, selected, vendors)
+    return [NearbyVendor(**vendor) for vendor in vendors]
+
+@api_router.delete("/vendors/{vendor_id}")
+async def delete_vendor(vendor_id: str, current_user: User = Depends(get_current_user)):
+    now = datetime.utcnow()
+    result = await db.vendors.update_one(
+        {"id": vendor_id, "user_id": current_user.id, "deleted_at": None},
+        {"$set": {"deleted_at": now, "updated_at": now}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Vendor not found")
+    return {"message": "Vendor deleted"}
+
 # Task routes
 @api_router.post("/tasks", response_model=Task)
 async def create_task(task_data: TaskCreate, current_user: User = Depends(get_current_user)):
@@ -312,19 +876,59 @@ async def create_task(task_data: TaskCreate, current_user: User = Depends(get_cu
     await db.tasks.insert_one(task.dict())
     return task
 
-@api_router.get("/tasks", response_model=List[Task])
-async def get_tasks(current_user: User = Depends(get_current_user)):
-    tasks = await db.tasks.find({"user_id": current_user.id}).to_list(1000)
+@api_router.get("/tasks", response_model=List[Task], response_class=NegotiatedResponse)
+async def get_tasks(fields: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    selected = parse_fields(fields, Task)
+    query = {"user_id": current_user.id, "deleted_at": None}
+    if selected:
+        tasks = await db.tasks.find(query, fields_projection(selected)).to_list(1000)
+        return sparse_response(Task, selected, tasks)
+    tasks = await db.tasks.find(query).to_list(1000)
     return [Task(**task) for task in tasks]
 
 @api_router.put("/tasks/{task_id}")
 async def update_task(task_id: str, task_data: TaskCreate, current_user: User = Depends(get_current_user)):
     await db.tasks.update_one(
-        {"id": task_id, "user_id": current_user.id},
-        {"$set": task_data.dict()}
+        {"id": task_id, "user_id": current_user.id, "deleted_at": None},
+        {"$set": {**task_data.dict(), "updated_at": datetime.utcnow()}}
     )
     return {"message": "Task updated"}
 
+@api_router.delete("/tasks/{task_id}")
+async def delete_task(task_id: str, current_user: User = Depends(get_current_user)):
+    now = datetime.utcnow()
+    result = await db.tasks.update_one(
+        {"id": task_id, "user_id": current_user.id, "deleted_at": None},
+        {"$set": {"deleted_at": now, "updated_at": now}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return {"message": "Task deleted"}
+
+# Geospatial search
+async def geo_near(collection, lng: float, lat: float, max_km: float, query: dict, skip: int, limit: int, fields: Optional[tuple] = None):
+    if not (-180 <= lng <= 180 and -90 <= lat <= 90):
+        raise HTTPException(status_code=400, detail="Invalid coordinates")
+    if max_km <= 0 or skip < 0 or not 1 <= limit <= 100:
+        raise HTTPException(status_code=400, detail="Invalid search parameters")
+    # $geoNear must be the first stage; it returns documents sorted by distance
+    pipeline = [
+        {"$geoNear": {
+            "near": {"type": "Point", "coordinates": [lng, lat]},
+            "key": "location",
+            "distanceField": "distance_km",
+            "distanceMultiplier": 0.001,
+            "maxDistance": max_km * 1000,
+            "query": query,
+            "spherical": True,
+        }},
+        {"$skip": skip},
+        {"$limit": limit},
+    ]
+    if fields:
+        pipeline.append({"$project": fields_projection(fields)})
+    return await collection.aggregate(pipeline).to_list(limit)
+
 # Venue routes
 @api_router.post("/venues", response_model=Venue)
 async def create_venue(venue_data: VenueCreate, current_user: User = Depends(get_current_user)):
@@ -334,30 +938,181 @@ async def create_venue(venue_data: VenueCreate, current_user: User = Depends(get
     await db.venues.insert_one(venue.dict())
     return venue
 
-@api_router.get("/venues", response_model=List[Venue])
-async def get_venues(current_user: User = Depends(get_current_user)):
-    venues = await db.venues.find({"user_id": current_user.id}).to_list(1000)
+@api_router.get("/venues", response_model=List[Venue], response_class=NegotiatedResponse)
+async def get_venues(fields: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    selected = parse_fields(fields, Venue)
+    query = {"user_id": current_user.id, "deleted_at": None}
+    if selected:
+        venues = await db.venues.find(query, fields_projection(selected)).to_list(1000)
+        return sparse_response(Venue, selected, venues)
+    venues = await db.venues.find(query).to_list(1000)
     return [Venue(**venue) for venue in venues]
 
+@api_router.get("/venues/near", response_model=List[NearbyVenue], response_class=NegotiatedResponse)
+async def get_venues_near(
+    lng: float, lat: float, max_km: float = 20, min_capacity: Optional[int] = None,
+    max_price: Optional[float] = None, skip: int = 0, limit: int = 20, fields: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    selected = parse_fields(fields, NearbyVenue)
+    query = {"user_id": current_user.id, "deleted_at": None}
+    if min_capacity is not None:
+        query["capacity"] = {"$gte": min_capacity}
+    if max_price is not None:
+        query["price"] = {"$lte": max_price}
+    venues = await geo_near(db.venues, lng, lat, max_km, query, skip, limit, selected)
+    if selected:
+        return sparse_response(NearbyVenue, selected, venues)
+    return [NearbyVenue(**venue) for venue in venues]
+
+@api_router.delete("/venues/{venue_id}")
+async def delete_venue(venue_id: str, current_user: User = Depends(get_current_user)):
+    now = datetime.utcnow()
+    result = await db.venues.update_one(
+        {"id": venue_id, "user_id": current_user.id, "deleted_at": None},
+        {"$set": {"deleted_at": now, "updated_at": now}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Venue not found")
+    return {"message": "Venue deleted"}
+
+# Sync routes
+SYNC_COLLECTIONS = {"budgets": Budget, "guests": Guest, "vendors": Vendor, "tasks": Task, "venues": Venue}
+
+@api_router.get("/sync", response_model=SyncResponse, response_class=NegotiatedResponse)
+async def sync(since: Optional[datetime] = None, current_user: User = Depends(get_current_user)):
+    started_at = datetime.utcnow()
+    if since is not None and since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+
+    # Tombstones are purged after the retention window, so older clients start over
+    full_resync = since is None or since < started_at - timedelta(days=SOFT_DELETE_RETENTION_DAYS)
+    if full_resync:
+        query = {"user_id": current_user.id, "deleted_at": None}
+    else:
+        query = {"user_id": current_user.id, "updated_at": {"$gt": since}}
+
+    results = await asyncio.gather(*(db[name].find(query).to_list(None) for name in SYNC_COLLECTIONS))
+    high_water_mark = started_at - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+    response = {
+        "full_resync": full_resync,
+        "high_water_mark": high_water_mark if full_resync else max(since, high_water_mark),
+        "deleted": {},
+    }
+    for (name, model), docs in zip(SYNC_COLLECTIONS.items(), results):
+        response[name] = [model(**doc) for doc in docs if doc.get("deleted_at") is None]
+        response["deleted"][name] = [doc["id"] for doc in docs if doc.get("deleted_at") is not None]
+    return response
+
+# Report job helpers
+def get_report_pool():
+    global report_pool
+    if report_pool is None:
+        # Motor's threads are already running; forking them could deadlock the
+        # workers on inherited locks, and the workers only need the reports module
+        report_pool = ProcessPoolExecutor(
+            max_workers=REPORT_WORKERS, mp_context=multiprocessing.get_context("forkserver")
+        )
+    return report_pool
+
+async def run_report_job(job: ReportJob):
+    try:
+        await db.report_jobs.update_one(
+            {"id": job.id}, {"$set": {"status": "running", "started_at": datetime.utcnow()}}
+        )
+        collection, columns = REPORT_COLUMNS[job.report_type]
+        projection = {"_id": 0, **{field: 1 for field, _ in columns}}
+        rows = await db[collection].find(
+            {"user_id": job.user_id, "deleted_at": None}, projection
+        ).sort("created_at", 1).to_list(None)
+
+        # Identical data renders to the same file, so unchanged reports are served from disk
+        digest = hashlib.sha256(json.dumps(rows, sort_keys=True, default=str).encode()).hexdigest()
+        output_path = str(REPORTS_DIR / job.user_id / f"{job.report_type}-{digest[:32]}.{job.format}")
+        title = f"{job.report_type.title()} report"
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            get_report_pool(), render_report, job.report_type, job.format, title, rows, output_path
+        )
+        # Every data change renders a new digest-named file; drop the ones nobody reused
+        await loop.run_in_executor(
+            get_report_pool(), prune_reports, str(REPORTS_DIR / job.user_id), REPORT_RETENTION_HOURS * 3600
+        )
+        update = {"status": "done", "output_path": output_path}
+    except Exception as e:
+        logger.exception("Report job %s failed", job.id)
+        update = {"status": "failed", "error": str(e)}
+    update["completed_at"] = datetime.utcnow()
+    # Dropping dedup_key releases the in-flight slot for the next identical request
+    await db.report_jobs.update_one({"id": job.id}, {"$set": update, "$unset": {"dedup_key": ""}})
+
+# Report routes
+@api_router.post("/reports", response_model=ReportJob, status_code=status.HTTP_202_ACCEPTED)
+async def create_report(job_data: ReportJobCreate, current_user: User = Depends(get_current_user)):
+    if job_data.report_type not in REPORT_COLUMNS:
+        raise HTTPException(status_code=400, detail="Invalid report type")
+    if job_data.format not in REPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Invalid report format")
+
+    dedup_key = f"{current_user.id}:{job_data.report_type}:{job_data.format}"
+    for _ in range(2):
+        job = ReportJob(user_id=current_user.id, **job_data.dict())
+        try:
+            await db.report_jobs.insert_one({**job.dict(), "dedup_key": dedup_key})
+        except DuplicateKeyError:
+            # An identical job is already queued or running; hand that one back
+            existing = await db.report_jobs.find_one({"dedup_key": dedup_key})
+            if existing is None:
+                continue
+            leased_at = existing.get("started_at") or existing["created_at"]
+            if leased_at > datetime.utcnow() - timedelta(minutes=REPORT_JOB_LEASE_MINUTES):
+                return ReportJob(**existing)
+            # The job outlived its lease, so its worker is gone: fail it and free the slot
+            await db.report_jobs.update_one({"id": existing["id"], "dedup_key": dedup_key}, {
+                "$set": {"status": "failed", "error": "Report job timed out", "completed_at": datetime.utcnow()},
+                "$unset": {"dedup_key": ""},
+            })
+            continue
+        task = asyncio.create_task(run_report_job(job))
+        report_tasks.add(task)
+        task.add_done_callback(report_tasks.discard)
+        return job
+    raise HTTPException(status_code=503, detail="Could not queue report")
+
+@api_router.get("/reports/{job_id}", response_model=ReportJob)
+async def get_report(job_id: str, current_user: User = Depends(get_current_user)):
+    job = await db.report_jobs.find_one({"id": job_id, "user_id": current_user.id})
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return ReportJob(**job)
+
+@api_router.get("/reports/{job_id}/download")
+async def download_report(job_id: str, current_user: User = Depends(get_current_user)):
+    job = await db.report_jobs.find_one({"id": job_id, "user_id": current_user.id})
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail="Report not ready")
+    if not os.path.exists(job["output_path"]):
+        raise HTTPException(status_code=410, detail="Report expired")
+    media_type = "text/csv" if job["format"] == "csv" else "application/pdf"
+    return FileResponse(
+        job["output_path"], media_type=media_type, filename=f"{job['report_type']}.{job['format']}"
+    )
+
 # Analytics routes
 @api_router.get("/analytics/dashboard")
 async def get_dashboard_analytics(current_user: User = Depends(get_current_user)):
     # Budget analytics
-    budgets = await db.budgets.find({"user_id": current_user.id}).to_list(1000)
+    budgets = await db.budgets.find({"user_id": current_user.id, "deleted_at": None}).to_list(1000)
     total_planned = sum(b.get("planned_amount", 0) for b in budgets)
     total_spent = sum(b.get("spent_amount", 0) for b in budgets)
     
     # Guest analytics
-    guests = await db.guests.find({"user_id": current_user.id}).to_list(1000)
-    guest_stats = {
-        "total": len(guests),
-        "accepted": len([g for g in guests if g.get("rsvp_status") == "accepted"]),
-        "declined": len([g for g in guests if g.get("rsvp_status") == "declined"]),
-        "pending": len([g for g in guests if g.get("rsvp_status") == "pending"])
-    }
+    guest_stats = await get_rsvp_counts(current_user.id)
     
     # Task analytics
-    tasks = await db.tasks.find({"user_id": current_user.id}).to_list(1000)
+    tasks = await db.tasks.find({"user_id": current_user.id, "deleted_at": None}).to_list(1000)
     task_stats = {
         "total": len(tasks),
         "completed": len([t for t in tasks if t.get("completed")]),
@@ -365,7 +1120,7 @@ async def get_dashboard_analytics(current_user: User = Depends(get_current_user)
     }
     
     # Vendor analytics
-    vendors = await db.vendors.find({"user_id": current_user.id}).to_list(1000)
+    vendors = await db.vendors.find({"user_id": current_user.id, "deleted_at": None}).to_list(1000)
     vendor_stats = {
         "total": len(vendors),
         "booked": len([v for v in vendors if v.get("status") == "booked"])
@@ -383,6 +1138,106 @@ async def get_dashboard_analytics(current_user: User = Depends(get_current_user)
         "vendors": vendor_stats
     }
 
+@api_router.get("/analytics/trends", response_model=List[AnalyticsSnapshot])
+async def get_analytics_trends(days: int = 90, current_user: User = Depends(get_current_user)):
+    # Snapshots are written daily by snapshots.py; this only reads them back
+    if not 1 <= days <= 730:
+        raise HTTPException(status_code=400, detail="days must be between 1 and 730")
+    start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+    snapshots = await db.analytics_snapshots.find(
+        {"user_id": current_user.id, "day": {"$gte": start}}, {"_id": 0, "user_id": 0}
+    ).sort("day", 1).to_list(days)
+    return [AnalyticsSnapshot(**snapshot) for snapshot in snapshots]
+
+# Calendar feed
+# user_id -> rendered .ics bytes, versioned by the feed's ETag
+calendar_cache = VersionedLRU(1024)
+CALENDAR_USER_PROJECTION = {
+    "_id": 0, "id": 1, "full_name": 1, "partner_name": 1, "wedding_date": 1, "created_at": 1, "calendar_version": 1,
+}
+CALENDAR_TASK_PROJECTION = {
+    "_id": 0, "id": 1, "title": 1, "description": 1, "category": 1, "priority": 1,
+    "due_date": 1, "completed": 1, "updated_at": 1,
+}
+
+def create_calendar_token(user_id: str, version: int):
+    # v must match users.calendar_version, so resetting the link revokes old URLs
+    return jwt.encode({"sub": user_id, "v": version, "scope": "calendar"}, SECRET_KEY, algorithm=ALGORITHM)
+
+def decode_calendar_token(token: str):
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=404, detail="Calendar not found")
+    if payload.get("scope") != "calendar" or not payload.get("sub"):
+        raise HTTPException(status_code=404, detail="Calendar not found")
+    return payload["sub"], payload.get("v", 0)
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison (RFC 9110): the compression middleware sends W/ ETags for encoded bodies
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return etag.removeprefix("W/") in tags or if_none_match.strip() == "*"
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+def calendar_link(user_id: str, version: int):
+    token = create_calendar_token(user_id, version)
+    return {"token": token, "url": f"/api/calendar/{token}.ics"}
+
+@api_router.get("/calendar/link", response_model=CalendarLink)
+async def get_calendar_link(current_user: User = Depends(get_current_user)):
+    user = await db.users.find_one({"id": current_user.id}, {"_id": 0, "calendar_version": 1})
+    return calendar_link(current_user.id, (user or {}).get("calendar_version", 0))
+
+@api_router.post("/calendar/link/reset", response_model=CalendarLink)
+async def reset_calendar_link(current_user: User = Depends(get_current_user)):
+    # Invalidates every previously issued feed URL, e.g. after one leaked
+    user = await db.users.find_one_and_update(
+        {"id": current_user.id}, {"$inc": {"calendar_version": 1}}, return_document=ReturnDocument.AFTER
+    )
+    return calendar_link(current_user.id, user["calendar_version"])
+
+@api_router.get("/calendar/{token}.ics")
+async def get_calendar_feed(token: str, request: Request):
+    user_id, version = decode_calendar_token(token)
+    user = await db.users.find_one({"id": user_id}, CALENDAR_USER_PROJECTION)
+    if user is None or user.get("calendar_version", 0) != version:
+        raise HTTPException(status_code=404, detail="Calendar not found")
+
+    # Task writes and deletes all bump updated_at, so the newest one versions the feed
+    latest = await db.tasks.find_one(
+        {"user_id": user_id}, {"_id": 0, "updated_at": 1}, sort=[("updated_at", -1)]
+    )
+    last_modified = max(filter(None, [latest and latest.get("updated_at"), user.get("created_at")]))
+    version = f"{last_modified.isoformat()}|{user.get('wedding_date')}|{user['full_name']}|{user.get('partner_name')}"
+    etag = '"' + hashlib.sha1(version.encode()).hexdigest()[:20] + '"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True),
+        "Cache-Control": "private, max-age=300",
+    }
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    body = calendar_cache.get(user_id, etag)
+    if body is None:
+        tasks = await db.tasks.find(
+            {"user_id": user_id, "deleted_at": None, "due_date": {"$ne": None}}, CALENDAR_TASK_PROJECTION
+        ).sort("due_date", 1).to_list(None)
+        body = render_calendar(user, tasks, datetime.utcnow())
+        calendar_cache.put(user_id, etag, body)
+    return Response(body, media_type="text/calendar; charset=utf-8", headers=headers)
+
 # Include router
 app.include_router(api_router)
 
@@ -394,6 +1249,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in profiling: send X-Profile: $PROFILE_ADMIN_TOKEN, or set PROFILE_SAMPLE_RATE.
+# Not installed at all otherwise, so unprofiled deployments pay nothing for it.
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_ADMIN_TOKEN = os.environ.get('PROFILE_ADMIN_TOKEN')
+if PROFILE_SAMPLE_RATE > 0 or PROFILE_ADMIN_TOKEN:
+    app.add_middleware(
+        RequestProfiler,
+        output_dir=Path(os.environ.get('PROFILE_DIR', ROOT_DIR / 'profiles')),
+        sample_rate=PROFILE_SAMPLE_RATE,
+        admin_token=PROFILE_ADMIN_TOKEN,
+    )
+
+# Outermost, so MessagePack negotiation is visible to every handler; gzip/brotli above the threshold
+app.add_middleware(
+    ResponseEncodingMiddleware, minimum_size=int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -401,6 +1273,46 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+async def ensure_soft_delete_ttl(collection):
+    # TTL only fires on documents where deleted_at is a date, i.e. soft-deleted ones
+    expire_after = SOFT_DELETE_RETENTION_DAYS * 24 * 3600
+    try:
+        await collection.create_index("deleted_at", expireAfterSeconds=expire_after)
+    except OperationFailure as e:
+        if e.code != 85:  # IndexOptionsConflict: the retention setting changed
+            raise
+        await db.command("collMod", collection.name, index={
+            "keyPattern": {"deleted_at": 1}, "expireAfterSeconds": expire_after
+        })
+        logger.info("Updated %s soft-delete TTL to %d days", collection.name, SOFT_DELETE_RETENTION_DAYS)
+
+@app.on_event("startup")
+async def startup_db_client():
+    slow_query_listener.loop = asyncio.get_running_loop()
+    for name in ("budgets", "guests", "vendors", "tasks", "venues"):
+        collection = db[name]
+        await collection.create_index("id", unique=True)
+        # Live-record queries filter on {"user_id": ..., "deleted_at": None}
+        await collection.create_index([("user_id", 1), ("deleted_at", 1)])
+        await collection.create_index([("user_id", 1), ("updated_at", 1)])
+        await ensure_soft_delete_ttl(collection)
+    for name in ("venues", "vendors"):
+        # user_id first: the equality bounds $geoNear to one couple's entries
+        # instead of walking every nearby user's and filtering afterwards
+        await db[name].create_index([("user_id", 1), ("location", "2dsphere")])
+        # $geoNear refuses to pick between two 2dsphere indexes on location
+        if "location_2dsphere_user_id_1" in await db[name].index_information():
+            await db[name].drop_index("location_2dsphere_user_id_1")
+    await db.guest_counters.create_index("user_id", unique=True)
+    # users.id drives the keyset pagination of the snapshot job
+    await db.users.create_index("id", unique=True)
+    await db.analytics_snapshots.create_index([("user_id", 1), ("day", 1)], unique=True)
+    await db.report_jobs.create_index("id", unique=True)
+    await db.report_jobs.create_index("user_id")
+    await db.report_jobs.create_index("dedup_key", unique=True, sparse=True)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if report_pool is not None:
+        report_pool.shutdown(wait=False, cancel_futures=True)
     client.close()
\ No newline at end of file
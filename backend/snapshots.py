@@ -0,0 +1,122 @@
+"""Daily analytics snapshot job.
+
+Walks all users in id order, computes their dashboard metrics with one
+aggregation per collection per chunk of users, and upserts one document per
+user per day into analytics_snapshots. The same guest counts overwrite the
+live guest_counters, repairing any drift in the RSVP counters, unless a
+counter changed while the chunk was being aggregated. Meant to run once a day
+from cron:
+
+    python snapshots.py --chunk-size 500
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import typer
+from pymongo import UpdateOne
+
+import server
+
+app = typer.Typer(help="Compute daily analytics snapshots for every user.")
+
+
+def count_if(expression) -> dict:
+    return {"$sum": {"$cond": [expression, 1, 0]}}
+
+
+# collection -> ($group accumulators, {snapshot field: accumulator name})
+SNAPSHOT_METRICS = {
+    "guests": ({
+        "total": {"$sum": 1},
+        "accepted": count_if({"$eq": ["$rsvp_status", "accepted"]}),
+        "declined": count_if({"$eq": ["$rsvp_status", "declined"]}),
+        "pending": count_if({"$eq": ["$rsvp_status", "pending"]}),
+    }, {
+        "guests_total": "total", "guests_accepted": "accepted",
+        "guests_declined": "declined", "guests_pending": "pending",
+    }),
+    "tasks": ({
+        "total": {"$sum": 1},
+        "completed": count_if("$completed"),
+    }, {"tasks_total": "total", "tasks_completed": "completed"}),
+    "budgets": ({
+        "planned": {"$sum": "$planned_amount"},
+        "spent": {"$sum": "$spent_amount"},
+    }, {"budget_planned": "planned", "budget_spent": "spent"}),
+    "vendors": ({
+        "total": {"$sum": 1},
+        "booked": count_if({"$eq": ["$status", "booked"]}),
+    }, {"vendors_total": "total", "vendors_booked": "booked"}),
+}
+
+
+async def chunk_metrics(user_ids: List[str]) -> Dict[str, dict]:
+    metrics = {user_id: {field: 0 for _, fields in SNAPSHOT_METRICS.values() for field in fields} for user_id in user_ids}
+
+    async def collect(name, accumulators, fields):
+        pipeline = [
+            {"$match": {"user_id": {"$in": user_ids}, "deleted_at": None}},
+            {"$group": {"_id": "$user_id", **accumulators}},
+        ]
+        async for row in server.db[name].aggregate(pipeline):
+            for field, accumulator in fields.items():
+                metrics[row["_id"]][field] = row[accumulator]
+
+    await asyncio.gather(*(collect(name, *spec) for name, spec in SNAPSHOT_METRICS.items()))
+    return metrics
+
+
+async def snapshot_all_users(day: datetime, chunk_size: int) -> int:
+    day = day.replace(hour=0, minute=0, second=0, microsecond=0)
+    # Each chunk's $in aggregation is expected to be slow; keep it out of the slow-query log
+    server.slow_query_listener.threshold_ms = float("inf")
+    last_id: Optional[str] = None
+    written = 0
+    while True:
+        # Keyset pagination on the unique id keeps every chunk an index range scan
+        query = {"id": {"$gt": last_id}} if last_id is not None else {}
+        users = await server.db.users.find(query, {"_id": 0, "id": 1}).sort("id", 1).limit(chunk_size).to_list(chunk_size)
+        if not users:
+            return written
+        user_ids = [user["id"] for user in users]
+        # Read counter versions first: a repair only lands if no $inc happened since
+        versions = {
+            counter["user_id"]: counter.get("version")
+            async for counter in server.db.guest_counters.find(
+                {"user_id": {"$in": user_ids}}, {"_id": 0, "user_id": 1, "version": 1}
+            )
+        }
+        metrics = await chunk_metrics(user_ids)
+        await server.db.analytics_snapshots.bulk_write([
+            UpdateOne({"user_id": user_id, "day": day}, {"$set": values}, upsert=True)
+            for user_id, values in metrics.items()
+        ], ordered=False)
+        # Users without counters get them on their next dashboard load or guest write
+        repairs = [
+            UpdateOne({"user_id": user_id, "version": versions[user_id]}, {
+                "$set": {field: values[f"guests_{field}"] for field in ("total",) + server.RSVP_STATUSES},
+                "$inc": {"version": 1},
+            })
+            for user_id, values in metrics.items() if user_id in versions
+        ]
+        if repairs:
+            await server.db.guest_counters.bulk_write(repairs, ordered=False)
+        written += len(user_ids)
+        last_id = user_ids[-1]
+
+
+@app.command()
+def main(
+    chunk_size: int = typer.Option(500, help="Users per aggregation round"),
+    day: Optional[datetime] = typer.Option(None, formats=["%Y-%m-%d"], help="Snapshot day (UTC), defaults to today"),
+):
+    started = time.perf_counter()
+    written = asyncio.run(snapshot_all_users(day or datetime.utcnow(), chunk_size))
+    typer.echo(f"wrote {written} snapshots in {time.perf_counter() - started:.1f}s")
+    server.client.close()
+
+
+if __name__ == "__main__":
+    app()
@@ -4,6 +4,8 @@ import json
 from datetime import datetime
 import uuid
 import sys
+import time
+import msgpack
 
 # Backend URL from frontend/.env
 BACKEND_URL = "https://e98646cb-84b6-452d-98e4-23dfcbd69864.preview.emergentagent.com"
@@ -519,6 +521,398 @@ class WeddingPlannerAPITest(unittest.TestCase):
         
         print("✅ Comprehensive analytics retrieved successfully")
 
+    def test_18_public_rsvp(self):
+        """Test answering an RSVP through a signed guest link"""
+        print("\n🔍 Testing public RSVP link")
+        
+        if not self.token:
+            self.token, self.headers = self.test_01_register()
+            self.test_07_create_guest()
+            
+        response = requests.get(
+            f"{API_URL}/guests/{self.guest_id}/rsvp-link",
+            headers=self.headers
+        )
+        
+        self.assertEqual(response.status_code, 200, f"Get RSVP link failed: {response.text}")
+        rsvp_token = response.json()["token"]
+        
+        # The public endpoint must not require the couple's credentials
+        public_headers = {"Content-Type": "application/json"}
+        response = requests.post(
+            f"{API_URL}/rsvp/{rsvp_token}",
+            headers=public_headers,
+            json={"rsvp_status": "declined"}
+        )
+        
+        self.assertEqual(response.status_code, 200, f"RSVP submission failed: {response.text}")
+        
+        response = requests.post(
+            f"{API_URL}/rsvp/{rsvp_token}",
+            headers=public_headers,
+            json={"rsvp_status": "maybe"}
+        )
+        self.assertEqual(response.status_code, 422, "Invalid RSVP status should be rejected")
+        
+        response = requests.post(
+            f"{API_URL}/rsvp/{rsvp_token}",
+            headers=public_headers,
+            json={"rsvp_status": "accepted", "dietary_restrictions": "x" * 201}
+        )
+        self.assertEqual(response.status_code, 422, "Oversized dietary restrictions should be rejected")
+        
+        response = requests.post(
+            f"{API_URL}/rsvp/not-a-valid-token",
+            headers=public_headers,
+            json={"rsvp_status": "accepted"}
+        )
+        self.assertEqual(response.status_code, 404, "Forged RSVP link should be rejected")
+        
+        # Verify the analytics counters followed the RSVP
+        response = requests.get(
+            f"{API_URL}/analytics/dashboard",
+            headers=self.headers
+        )
+        
+        data = response.json()
+        self.assertEqual(data["guests"]["declined"], 1, "Declined counter not updated")
+        self.assertEqual(data["guests"]["pending"], 0, "Pending counter not updated")
+        
+        print("✅ Public RSVP recorded successfully")
+
+    def test_19_delete_guest(self):
+        """Test soft-deleting a guest"""
+        print("\n🔍 Testing guest deletion")
+        
+        if not self.token:
+            self.token, self.headers = self.test_01_register()
+            self.test_07_create_guest()
+            
+        response = requests.delete(
+            f"{API_URL}/guests/{self.guest_id}",
+            headers=self.headers
+        )
+        
+        self.assertEqual(response.status_code, 200, f"Guest deletion failed: {response.text}")
+        
+        # Deleted guests disappear from lists and analytics
+        response = requests.get(
+            f"{API_URL}/guests",
+            headers=self.headers
+        )
+        
+        data = response.json()
+        self.assertIsNone(next((g for g in data if g["id"] == self.guest_id), None), "Deleted guest still listed")
+        
+        response = requests.get(
+            f"{API_URL}/analytics/dashboard",
+            headers=self.headers
+        )
+        self.assertEqual(response.json()["guests"]["total"], 0, "Deleted guest still counted")
+        
+        # Deleting twice is a 404
+        response = requests.delete(
+            f"{API_URL}/guests/{self.guest_id}",
+            headers=self.headers
+        )
+        self.assertEqual(response.status_code, 404, "Second delete should return 404")
+        
+        print("✅ Guest deleted successfully")
+
+    def test_20_report_job(self):
+        """Test submitting, polling and downloading a report job"""
+        print("\n🔍 Testing report jobs")
+        
+        if not self.token:
+            self.token, self.headers = self.test_01_register()
+            self.test_04_create_budget_item()
+            
+        response = requests.post(
+            f"{API_URL}/reports",
+            headers=self.headers,
+            json={"report_type": "budget", "format": "csv"}
+        )
+        
+        self.assertEqual(response.status_code, 202, f"Report submission failed: {response.text}")
+        job_id = response.json()["id"]
+        
+        for _ in range(30):
+            response = requests.get(
+                f"{API_URL}/reports/{job_id}",
+                headers=self.headers
+            )
+            if response.json()["status"] in ("done", "failed"):
+                break
+            time.sleep(1)
+        
+        self.assertEqual(response.json()["status"], "done", f"Report job did not finish: {response.text}")
+        
+        response = requests.get(
+            f"{API_URL}/reports/{job_id}/download",
+            headers=self.headers
+        )
+        
+        self.assertEqual(response.status_code, 200, f"Report download failed: {response.text}")
+        self.assertIn("Venue", response.text, "Budget category missing from report")
+        
+        print("✅ Report generated successfully")
+
+    def test_21_delta_sync(self):
+        """Test delta sync since a high-water mark"""
+        print("\n🔍 Testing delta sync")
+        
+        if not self.token:
+            self.token, self.headers = self.test_01_register()
+            self.test_07_create_guest()
+            
+        response = requests.get(
+            f"{API_URL}/sync",
+            headers=self.headers
+        )
+        
+        self.assertEqual(response.status_code, 200, f"Full sync failed: {response.text}")
+        data = response.json()
+        self.assertTrue(data["full_resync"], "First sync should be a full resync")
+        self.assertEqual(len(data["guests"]), 1, "Guest missing from full sync")
+        since = data["high_water_mark"]
+        
+        response = requests.delete(
+            f"{API_URL}/guests/{self.guest_id}",
+            headers=self.headers
+        )
+        self.assertEqual(response.status_code, 200, f"Guest deletion failed: {response.text}")
+        
+        response = requests.get(
+            f"{API_URL}/sync",
+            headers=self.headers,
+            params={"since": since}
+        )
+        
+        self.assertEqual(response.status_code, 200, f"Delta sync failed: {response.text}")
+        data = response.json()
+        self.assertFalse(data["full_resync"], "Delta sync should not be a full resync")
+        self.assertIn(self.guest_id, data["deleted"]["guests"], "Tombstone missing from delta sync")
+        
+        print("✅ Delta sync returned changes successfully")
+
+    def test_22_guest_duplicates(self):
+        """Test duplicate detection during bulk guest import"""
+        print("\n🔍 Testing guest de-duplication")
+        
+        if not self.token:
+            self.token, self.headers = self.test_01_register()
+            self.test_07_create_guest()
+            
+        import_data = [
+            {"name": "Alex Jonson", "phone": "(555) 123-4567"},  # Same phone as Alex Johnson
+            {"name": "Sam Carter", "email": "sam@example.com"}
+        ]
+        
+        response = requests.post(
+            f"{API_URL}/guests/bulk",
+            headers=self.headers,
+            params={"skip_duplicates": True},
+            json=import_data
+        )
+        
+        self.assertEqual(response.status_code, 200, f"Bulk import failed: {response.text}")
+        data = response.json()
+        self.assertEqual(data["skipped"], 1, "Duplicate guest was not skipped")
+        self.assertEqual([g["name"] for g in data["created"]], ["Sam Carter"], "Unexpected imported guests")
+        self.assertIn(self.guest_id, data["duplicates"][0]["guest_ids"], "Existing guest not matched")
+        
+        response = requests.get(
+            f"{API_URL}/guests/duplicates",
+            headers=self.headers
+        )
+        
+        self.assertEqual(response.status_code, 200, f"Get duplicates failed: {response.text}")
+        self.assertEqual(response.json(), [], "Skipped duplicate should not have been stored")
+        
+        print("✅ Guest duplicates detected successfully")
+
+    def test_23_catering_manifest(self):
+        """Test the catering manifest headcounts"""
+        print("\n🔍 Testing catering manifest")
+        
+        if not self.token:
+            self.token, self.headers = self.test_01_register()
+            self.test_07_create_guest()  # Friends, Vegetarian, plus one, pending
+            
+        response = requests.post(
+            f"{API_URL}/guests",
+            headers=self.headers,
+            json={"name": "Declined Guest", "rsvp_status": "declined", "group": "Friends"}
+        )
+        self.assertEqual(response.status_code, 200, f"Guest creation failed: {response.text}")
+        
+        response = requests.get(
+            f"{API_URL}/guests/manifest",
+            headers=self.headers
+        )
+        
+        self.assertEqual(response.status_code, 200, f"Get manifest failed: {response.text}")
+        data = response.json()
+        self.assertEqual(data["headcount"], 2, "Plus one not counted or declined guest included")
+        self.assertEqual(data["by_group"].get("friends"), 2, "Group headcount incorrect")
+        self.assertEqual(data["by_dietary"].get("vegetarian"), 1, "Dietary tag not normalized")
+        
+        print("✅ Catering manifest retrieved successfully")
+
+    def test_24_venues_near(self):
+        """Test geospatial venue search"""
+        print("\n🔍 Testing nearby venue search")
+        
+        if not self.token:
+            self.token, self.headers = self.test_01_register()
+            
+        venues = [
+            ("Close Chapel", [-73.99, 40.73], 150),   # ~1 km from the search point
+            ("Far Barn", [-74.60, 41.20], 150),       # ~70 km away
+            ("Tiny Hall", [-73.98, 40.74], 40)        # Close but too small
+        ]
+        for name, coordinates, capacity in venues:
+            response = requests.post(
+                f"{API_URL}/venues",
+                headers=self.headers,
+                json={
+                    "name": name,
+                    "venue_type": "reception",
+                    "address": "123 Test St",
+                    "capacity": capacity,
+                    "location": {"type": "Point", "coordinates": coordinates}
+                }
+            )
+            self.assertEqual(response.status_code, 200, f"Venue creation failed: {response.text}")
+        
+        response = requests.get(
+            f"{API_URL}/venues/near",
+            headers=self.headers,
+            params={"lng": -74.0, "lat": 40.73, "max_km": 20, "min_capacity": 100}
+        )
+        
+        self.assertEqual(response.status_code, 200, f"Nearby venue search failed: {response.text}")
+        data = response.json()
+        self.assertEqual([v["name"] for v in data], ["Close Chapel"], "Unexpected nearby venues")
+        self.assertLess(data[0]["distance_km"], 5, "Distance not reported in km")
+        
+        print("✅ Nearby venues retrieved successfully")
+
+    def test_25_sparse_fields(self):
+        """Test sparse fieldsets on list endpoints"""
+        print("\n🔍 Testing sparse fieldsets")
+        
+        if not self.token:
+            self.token, self.headers = self.test_01_register()
+            self.test_07_create_guest()
+            
+        response = requests.get(
+            f"{API_URL}/guests",
+            headers=self.headers,
+            params={"fields": "name,rsvp_status"}
+        )
+        
+        self.assertEqual(response.status_code, 200, f"Get guests with fields failed: {response.text}")
+        data = response.json()
+        self.assertEqual(set(data[0].keys()), {"id", "name", "rsvp_status"}, "Unexpected fields returned")
+        
+        response = requests.get(
+            f"{API_URL}/guests",
+            headers=self.headers,
+            params={"fields": "name,not_a_field"}
+        )
+        self.assertEqual(response.status_code, 400, "Unknown field should be rejected")
+        
+        print("✅ Sparse fieldsets returned successfully")
+
+    def test_26_calendar_feed(self):
+        """Test the iCalendar feed and conditional requests"""
+        print("\n🔍 Testing calendar feed")
+        
+        if not self.token:
+            self.token, self.headers = self.test_01_register()
+            self.test_12_create_task()
+            
+        response = requests.get(
+            f"{API_URL}/calendar/link",
+            headers=self.headers
+        )
+        
+        self.assertEqual(response.status_code, 200, f"Get calendar link failed: {response.text}")
+        feed_url = f"{BACKEND_URL}{response.json()['url']}"
+        
+        # Calendar clients poll without the couple's credentials
+        response = requests.get(feed_url)
+        
+        self.assertEqual(response.status_code, 200, f"Get calendar feed failed: {response.text}")
+        self.assertTrue(response.text.startswith("BEGIN:VCALENDAR"), "Feed is not iCalendar")
+        self.assertIn("Wedding day", response.text, "Wedding date missing from feed")
+        etag = response.headers.get("ETag")
+        self.assertIsNotNone(etag, "ETag header missing")
+        
+        response = requests.get(feed_url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304, "Unchanged feed should return 304")
+        
+        # Resetting the link revokes the old URL
+        response = requests.post(
+            f"{API_URL}/calendar/link/reset",
+            headers=self.headers
+        )
+        self.assertEqual(response.status_code, 200, f"Reset calendar link failed: {response.text}")
+        new_feed_url = f"{BACKEND_URL}{response.json()['url']}"
+        self.assertNotEqual(new_feed_url, feed_url, "Reset should issue a new link")
+        self.assertEqual(requests.get(feed_url).status_code, 404, "Old calendar link should be revoked")
+        self.assertEqual(requests.get(new_feed_url).status_code, 200, "New calendar link should work")
+        
+        print("✅ Calendar feed retrieved successfully")
+
+    def test_27_msgpack_guests(self):
+        """Test MessagePack negotiation on the guest list"""
+        print("\n🔍 Testing MessagePack guest list")
+        
+        if not self.token:
+            self.token, self.headers = self.test_01_register()
+            self.test_07_create_guest()
+            
+        response = requests.get(
+            f"{API_URL}/guests",
+            headers={**self.headers, "Accept": "application/msgpack"}
+        )
+        
+        self.assertEqual(response.status_code, 200, f"Get guests as MessagePack failed: {response.text}")
+        self.assertEqual(response.headers.get("Content-Type"), "application/msgpack", "Response is not MessagePack")
+        self.assertIn("Accept", response.headers.get("Vary", ""), "Vary: Accept header missing")
+        guests = msgpack.unpackb(response.content, raw=False)
+        self.assertEqual(guests, requests.get(f"{API_URL}/guests", headers=self.headers).json(), "MessagePack and JSON bodies differ")
+        
+        print("✅ MessagePack guest list retrieved successfully")
+
+    def test_28_analytics_trends(self):
+        """Test reading back daily analytics snapshots"""
+        print("\n🔍 Testing analytics trends")
+        
+        if not self.token:
+            self.token, self.headers = self.test_01_register()
+            
+        response = requests.get(
+            f"{API_URL}/analytics/trends",
+            headers=self.headers
+        )
+        
+        # Snapshots are written by the daily job, so a new couple has none yet
+        self.assertEqual(response.status_code, 200, f"Get analytics trends failed: {response.text}")
+        self.assertEqual(response.json(), [], "New user should have no snapshots")
+        
+        for days in (0, 731):
+            response = requests.get(
+                f"{API_URL}/analytics/trends",
+                headers=self.headers,
+                params={"days": days}
+            )
+            self.assertEqual(response.status_code, 400, f"days={days} should be rejected")
+        
+        print("✅ Analytics trends retrieved successfully")
+
 def run_tests():
     # Create a test suite
     test_suite = unittest.TestSuite()
@@ -541,6 +935,17 @@ def run_tests():
     test_suite.addTest(WeddingPlannerAPITest('test_15_create_venue'))
     test_suite.addTest(WeddingPlannerAPITest('test_16_get_venues'))
     test_suite.addTest(WeddingPlannerAPITest('test_17_updated_analytics'))
+    test_suite.addTest(WeddingPlannerAPITest('test_18_public_rsvp'))
+    test_suite.addTest(WeddingPlannerAPITest('test_19_delete_guest'))
+    test_suite.addTest(WeddingPlannerAPITest('test_20_report_job'))
+    test_suite.addTest(WeddingPlannerAPITest('test_21_delta_sync'))
+    test_suite.addTest(WeddingPlannerAPITest('test_22_guest_duplicates'))
+    test_suite.addTest(WeddingPlannerAPITest('test_23_catering_manifest'))
+    test_suite.addTest(WeddingPlannerAPITest('test_24_venues_near'))
+    test_suite.addTest(WeddingPlannerAPITest('test_25_sparse_fields'))
+    test_suite.addTest(WeddingPlannerAPITest('test_26_calendar_feed'))
+    test_suite.addTest(WeddingPlannerAPITest('test_27_msgpack_guests'))
+    test_suite.addTest(WeddingPlannerAPITest('test_28_analytics_trends'))
     
     # Run the tests
     runner = unittest.TextTestRunner(verbosity=2)
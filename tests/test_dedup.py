@@ -0,0 +1,95 @@
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from dedup import (  # noqa: E402
+    DUPLICATE_THRESHOLD,
+    blocking_keys,
+    duplicate_score,
+    find_duplicates,
+    normalize_email,
+    normalize_phone,
+    same_first_name,
+)
+
+
+def guest(id, name, email=None, phone=None):
+    return {"id": id, "name": name, "email": email, "phone": phone}
+
+
+class NormalizeTest(unittest.TestCase):
+    def test_email_drops_case_and_plus_tag(self):
+        self.assertEqual(normalize_email(" Mary.Smith+wedding@Example.COM "), "mary.smith@example.com")
+        self.assertIsNone(normalize_email(""))
+
+    def test_phone_compares_subscriber_number(self):
+        self.assertEqual(normalize_phone("+1 (555) 111-2222"), normalize_phone("555.111.2222"))
+        self.assertIsNone(normalize_phone("ext 12"))
+
+    def test_blocking_keys(self):
+        keys = blocking_keys(guest("1", "Jon Smith", "jon@example.com", "555-111-2222"))
+        self.assertEqual(keys, ["e:jon@example.com", "p:5551112222", "n:smith:j"])
+
+
+class DuplicateScoreTest(unittest.TestCase):
+    def assertDuplicate(self, a, b):
+        self.assertGreaterEqual(duplicate_score(a, b), DUPLICATE_THRESHOLD, f"{a['name']} / {b['name']}")
+
+    def assertNotDuplicate(self, a, b):
+        self.assertLess(duplicate_score(a, b), DUPLICATE_THRESHOLD, f"{a['name']} / {b['name']}")
+
+    def test_spelling_variant_is_duplicate(self):
+        self.assertDuplicate(guest("1", "Jon Smith"), guest("2", "John Smith"))
+        self.assertDuplicate(guest("1", "Jon Smith", phone="555-111-2222"), guest("2", "John Smith", phone="5551112222"))
+
+    def test_initial_with_shared_email_is_duplicate(self):
+        self.assertTrue(same_first_name(["j", "smith"], ["john", "smith"]))
+        self.assertDuplicate(guest("1", "J. Smith", "js@example.com"), guest("2", "John Smith", "js@example.com"))
+
+    def test_household_sharing_phone_is_not_duplicate(self):
+        self.assertNotDuplicate(guest("1", "Mary Smith", phone="555-111-2222"), guest("2", "Tom Smith", phone="555-111-2222"))
+        self.assertNotDuplicate(guest("1", "Emma Smith", phone="555-111-2222"), guest("2", "Liam Smith", phone="555-111-2222"))
+
+    def test_household_sharing_email_is_not_duplicate(self):
+        self.assertNotDuplicate(guest("1", "Mary Smith", "smiths@example.com"), guest("2", "Emma Smith", "smiths@example.com"))
+
+    def test_similar_first_names_without_contacts_are_not_duplicates(self):
+        self.assertNotDuplicate(guest("1", "Mary Smith"), guest("2", "Mark Smith"))
+        self.assertNotDuplicate(guest("1", "Tom Smith"), guest("2", "Tim Smith"))
+
+
+class FindDuplicatesTest(unittest.TestCase):
+    def test_household_stays_separate(self):
+        guests = [
+            guest("mary", "Mary Smith", "smiths@example.com", "555-111-2222"),
+            guest("tom", "Tom Smith", phone="555-111-2222"),
+            guest("emma", "Emma Smith", "smiths@example.com"),
+            guest("liam", "Liam Smith", phone="555-111-2222"),
+        ]
+        self.assertEqual(find_duplicates(guests), [])
+
+    def test_groups_and_picks_most_complete_primary(self):
+        guests = [
+            guest("a", "Jon Smith"),
+            guest("b", "John Smith", "john@example.com", "555-111-2222"),
+            guest("c", "Priya Patel"),
+        ]
+        [proposal] = find_duplicates(guests)
+        self.assertEqual(sorted(proposal["guest_ids"]), ["a", "b"])
+        self.assertEqual(proposal["primary_id"], "b")
+
+    def test_existing_guest_is_primary_for_imports(self):
+        existing = [guest("old", "Alex Johnson", "alex@example.com")]
+        incoming = [guest("new", "Alex Jonson", "alex@example.com", "555-111-2222")]
+        [proposal] = find_duplicates(existing + incoming, new_only_from=len(existing))
+        self.assertEqual(proposal["primary_id"], "old")
+
+    def test_pairs_of_existing_guests_are_skipped_for_imports(self):
+        existing = [guest("a", "Jon Smith"), guest("b", "John Smith")]
+        self.assertEqual(find_duplicates(existing + [guest("c", "Priya Patel")], new_only_from=2), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import logging
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from diagnostics import RequestProfiler, SlowQueryListener  # noqa: E402
+
+
+async def ping(request):
+    return JSONResponse({"ok": True})
+
+
+class RequestProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = Path(tempfile.mkdtemp())
+        app = Starlette(routes=[Route("/api/ping", ping)])
+        app.add_middleware(RequestProfiler, output_dir=self.output_dir, admin_token="sekret")
+        self.client = TestClient(app)
+
+    def test_admin_header_saves_profile(self):
+        response = self.client.get("/api/ping", headers={"X-Profile": "sekret"})
+
+        self.assertEqual(response.status_code, 200)
+        profile_id = response.headers.get("X-Profile-Id")
+        self.assertIsNotNone(profile_id, "X-Profile-Id header missing")
+        profiles = list(self.output_dir.glob(f"*-GET-api_ping-{profile_id}.prof"))
+        self.assertEqual(len(profiles), 1, "Profile file not written")
+
+    def test_wrong_token_is_not_profiled(self):
+        response = self.client.get("/api/ping", headers={"X-Profile": "guess"})
+
+        self.assertEqual(response.json(), {"ok": True})
+        self.assertNotIn("X-Profile-Id", response.headers)
+        self.assertEqual(list(self.output_dir.iterdir()), [])
+
+
+class SlowQueryListenerTest(unittest.TestCase):
+    def run_command(self, listener, duration_ms):
+        command = {"find": "guests", "filter": {"user_id": "u1"}}
+        event = SimpleNamespace(connection_id=("localhost", 27017), request_id=1, command=command)
+        listener.started(event)
+        listener.succeeded(SimpleNamespace(
+            connection_id=event.connection_id, request_id=1, duration_micros=duration_ms * 1000,
+            command_name="find", database_name="test",
+        ))
+
+    def test_slow_command_is_logged(self):
+        listener = SlowQueryListener(threshold_ms=100)
+        with self.assertLogs("slow_queries", level=logging.WARNING) as logs:
+            self.run_command(listener, 250)
+        self.assertIn("Slow find on test.guests", logs.output[0])
+        self.assertIn("'user_id': 'u1'", logs.output[0])
+
+    def test_fast_command_is_not_logged(self):
+        listener = SlowQueryListener(threshold_ms=100)
+        logger = logging.getLogger("slow_queries")
+        with mock.patch.object(logger, "warning") as warning:
+            self.run_command(listener, 5)
+        warning.assert_not_called()
+        self.assertEqual(listener._commands, {}, "Finished commands must not be kept")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import sys
+import unittest
+from pathlib import Path
+
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from encoding import ResponseEncodingMiddleware, accepts_msgpack, choose_encoding  # noqa: E402
+
+BODY = b"BEGIN:VCALENDAR\r\n" + b"SUMMARY:Book the florist\r\n" * 100
+
+
+async def feed(request):
+    return Response(BODY, media_type="text/calendar", headers={"ETag": '"abc123"'})
+
+
+class NegotiationTest(unittest.TestCase):
+    def test_choose_encoding(self):
+        self.assertEqual(choose_encoding("gzip, deflate, br"), "br")
+        self.assertEqual(choose_encoding("br;q=0.5, gzip"), "gzip")
+        self.assertEqual(choose_encoding("br;q=0, *"), "gzip")
+        self.assertIsNone(choose_encoding("gzip;q=0, identity"))
+        self.assertIsNone(choose_encoding("*;q=0"))
+        self.assertIsNone(choose_encoding(""))
+
+    def test_accepts_msgpack(self):
+        self.assertTrue(accepts_msgpack("application/json, application/msgpack"))
+        self.assertFalse(accepts_msgpack("application/msgpack;q=0"))
+        self.assertFalse(accepts_msgpack("*/*"))
+
+
+class ResponseEncodingMiddlewareTest(unittest.TestCase):
+    def setUp(self):
+        app = Starlette(routes=[Route("/feed.ics", feed)])
+        app.add_middleware(ResponseEncodingMiddleware, minimum_size=1024)
+        self.client = TestClient(app)
+
+    def test_encoded_body_gets_weak_etag(self):
+        response = self.client.get("/feed.ics", headers={"Accept-Encoding": "gzip"})
+
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.headers["ETag"], 'W/"abc123"')
+        self.assertEqual(response.content, BODY)
+
+    def test_identity_body_keeps_strong_etag(self):
+        response = self.client.get("/feed.ics", headers={"Accept-Encoding": "gzip;q=0, identity"})
+
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(response.headers["ETag"], '"abc123"')
+
+
+if __name__ == "__main__":
+    unittest.main()
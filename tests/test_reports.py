@@ -0,0 +1,41 @@
+import csv
+import io
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from reports import render_csv, report_table  # noqa: E402
+
+
+class RenderCsvTest(unittest.TestCase):
+    def render(self, rows):
+        return list(csv.reader(io.StringIO(render_csv(report_table("guests", rows)).decode("utf-8"))))
+
+    def test_formulas_are_defused(self):
+        rows = [
+            {"name": '=HYPERLINK("http://evil.example","RSVP")', "email": "@SUM(A1)"},
+            {"name": "+1 guest", "dietary_restrictions": "-cmd|' /C calc'!A0"},
+            {"name": "\tTabbed", "group": "\rFamily"},
+        ]
+        table = self.render(rows)
+
+        self.assertEqual(table[1][0], '\'=HYPERLINK("http://evil.example","RSVP")')
+        self.assertEqual(table[1][1], "'@SUM(A1)")
+        self.assertEqual(table[2][0], "'+1 guest")
+        self.assertEqual(table[2][5], "'-cmd|' /C calc'!A0")
+        self.assertEqual(table[3][0], "'\tTabbed")
+        self.assertEqual(table[3][6], "'\rFamily")
+
+    def test_plain_values_are_unchanged(self):
+        table = self.render([{"name": "Mary Smith", "email": "mary@example.com", "plus_one": True}])
+        self.assertEqual(table[1][:5], ["Mary Smith", "mary@example.com", "", "", "yes"])
+
+    def test_negative_amounts_stay_numeric(self):
+        csv_text = render_csv([["Category", "Spent"], ["Refund", "-50.00"]]).decode("utf-8")
+        self.assertIn("Refund,-50.00", csv_text)
+
+
+if __name__ == "__main__":
+    unittest.main()